@@ -235,8 +235,8 @@ async def test_aws_connectivity():
     """Test AWS service connectivity"""
     try:
         # Test S3
-        s3_test = s3_storage.list_documents()
-        s3_status = "connected" if s3_test is not None else "error"
+        s3_ok = await asyncio.to_thread(s3_storage.check_connection)
+        s3_status = "connected" if s3_ok else "error"
         
         # Test database
         db_stats = await aws_rag_system.get_system_stats()
@@ -4,6 +4,7 @@ AWS-specific configuration for IntelliClaim system
 
 import os
 import boto3
+from botocore.config import Config as BotoConfig
 from typing import Dict, Any, Optional
 from config import Config
 
@@ -19,6 +20,11 @@ class AWSConfig(Config):
     S3_DOCUMENTS_PREFIX = "documents/"
     S3_UPLOADS_PREFIX = "uploads/"
     S3_CACHE_PREFIX = "cache/"
+    S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))  # Concurrent S3 connections per client
+    S3_MAX_ATTEMPTS = int(os.getenv("S3_MAX_ATTEMPTS", "10"))  # Adaptive-mode retry budget per request
+    S3_USE_ACCELERATE = os.getenv("S3_USE_ACCELERATE", "false").lower() == "true"  # Bucket must have Transfer Acceleration enabled
+    S3_MULTIPART_CHUNKSIZE = int(os.getenv("S3_MULTIPART_CHUNKSIZE_MB", "8")) * 1024 * 1024  # Multipart threshold and part size
+    S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "10"))  # Parallel parts per multipart upload
     
     # RDS Configuration
     RDS_HOST = os.getenv("RDS_HOST")
@@ -78,9 +84,16 @@ class AWSConfig(Config):
         return boto3.Session(region_name=cls.AWS_REGION)
     
     @classmethod
-    def get_s3_client(cls):
-        """Get S3 client"""
-        return cls.get_boto3_session().client('s3')
+    def get_s3_client(cls, max_pool_connections: Optional[int] = None):
+        """Get S3 client sized for the given number of concurrent requests"""
+        pool_size = max_pool_connections or cls.S3_MAX_POOL_CONNECTIONS
+        config = BotoConfig(
+            max_pool_connections=pool_size,
+            retries={"max_attempts": cls.S3_MAX_ATTEMPTS, "mode": "adaptive"},
+            tcp_keepalive=True,
+            s3={"use_accelerate_endpoint": cls.S3_USE_ACCELERATE}
+        )
+        return cls.get_boto3_session().client('s3', config=config)
     
     @classmethod
     def get_rds_client(cls):
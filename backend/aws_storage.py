@@ -4,16 +4,23 @@ Replaces local file storage with S3 for scalability and reliability
 """
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 import os
+import gzip
 import hashlib
+import io
+import shutil
 import tempfile
 from typing import Optional, Dict, Any, List
-from botocore.exceptions import ClientError, NoCredentialsError
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
 from aws_config import AWSConfig
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Text formats stored gzip-encoded; PDF and DOCX are already compressed
+COMPRESSIBLE_EXTENSIONS = ('.eml', '.json', '.txt', '.html')
+
 class S3StorageManager:
     """S3-based storage manager for documents and uploads"""
     
@@ -21,6 +28,7 @@ class S3StorageManager:
         self.config = AWSConfig()
         self.s3_client = self.config.get_s3_client()
         self.bucket_name = self.config.S3_BUCKET_NAME
+        self.transfer_config = self.build_transfer_config()
         
         # Ensure bucket exists
         self._ensure_bucket_exists()
@@ -51,6 +59,16 @@ class S3StorageManager:
                 logger.error(f"Error checking S3 bucket: {e}")
                 raise
     
+    def build_transfer_config(self, chunksize: Optional[int] = None, max_concurrency: Optional[int] = None) -> TransferConfig:
+        """Multipart settings for uploads: large files go up as parallel parts"""
+        chunksize = chunksize or self.config.S3_MULTIPART_CHUNKSIZE
+        return TransferConfig(
+            multipart_threshold=chunksize,
+            multipart_chunksize=chunksize,
+            max_concurrency=max_concurrency or self.config.S3_MAX_CONCURRENCY,
+            use_threads=True
+        )
+    
     def upload_document(self, file_path: str, file_name: Optional[str] = None) -> Dict[str, Any]:
         """Upload document to S3"""
         try:
@@ -60,16 +78,30 @@ class S3StorageManager:
             # Generate S3 key
             s3_key = f"{self.config.S3_DOCUMENTS_PREFIX}{file_name}"
             
-            # Upload file
-            with open(file_path, 'rb') as file:
+            extra_args = {
+                'ContentType': self._get_content_type(file_name),
+                'ServerSideEncryption': 'AES256'
+            }
+            
+            # Upload file (multipart above the transfer threshold); text formats go up gzipped
+            if self.is_compressible(file_name):
+                body = self.compress_document(file_path)
+                stored_size = len(body)
                 self.s3_client.upload_fileobj(
-                    file,
+                    io.BytesIO(body),
+                    self.bucket_name,
+                    s3_key,
+                    ExtraArgs={**extra_args, 'ContentEncoding': 'gzip'},
+                    Config=self.transfer_config
+                )
+            else:
+                stored_size = os.path.getsize(file_path)
+                self.s3_client.upload_file(
+                    file_path,
                     self.bucket_name,
                     s3_key,
-                    ExtraArgs={
-                        'ContentType': self._get_content_type(file_name),
-                        'ServerSideEncryption': 'AES256'
-                    }
+                    ExtraArgs=extra_args,
+                    Config=self.transfer_config
                 )
             
             # Generate presigned URL for access (valid for 1 hour)
@@ -87,7 +119,8 @@ class S3StorageManager:
                 "bucket": self.bucket_name,
                 "file_name": file_name,
                 "presigned_url": presigned_url,
-                "size": os.path.getsize(file_path)
+                "size": os.path.getsize(file_path),
+                "stored_size": stored_size
             }
             
         except Exception as e:
@@ -108,6 +141,12 @@ class S3StorageManager:
             
             self.s3_client.download_file(self.bucket_name, s3_key, local_path)
             
+            # download_file does not undo Content-Encoding; restore the original bytes
+            if self.is_compressible(s3_key):
+                head = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+                if head.get('ContentEncoding') == 'gzip':
+                    self._decompress_in_place(local_path)
+            
             logger.info(f"Downloaded document from S3: {s3_key}")
             
             return {
@@ -147,17 +186,16 @@ class S3StorageManager:
             if not prefix:
                 prefix = self.config.S3_DOCUMENTS_PREFIX
             
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=prefix
-            )
+            # Paginate: a single list_objects_v2 call stops at 1000 keys
+            paginator = self.s3_client.get_paginator('list_objects_v2')
             
             documents = []
-            if 'Contents' in response:
-                for obj in response['Contents']:
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                for obj in page.get('Contents', []):
                     documents.append({
                         "key": obj['Key'],
                         "size": obj['Size'],
+                        "etag": obj['ETag'].strip('"'),
                         "last_modified": obj['LastModified'],
                         "file_name": os.path.basename(obj['Key'])
                     })
@@ -210,6 +248,26 @@ class S3StorageManager:
                 "message": str(e)
             }
     
+    @staticmethod
+    def is_compressible(file_name: str) -> bool:
+        """Whether uploads of this file are stored gzip-encoded"""
+        return file_name.lower().endswith(COMPRESSIBLE_EXTENSIONS)
+    
+    @staticmethod
+    def compress_document(file_path: str) -> bytes:
+        """Gzip a file deterministically (mtime=0), so identical files produce identical objects"""
+        buf = io.BytesIO()
+        with open(file_path, 'rb') as src, gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=6, mtime=0) as gz:
+            shutil.copyfileobj(src, gz, 1 << 20)
+        return buf.getvalue()
+    
+    @staticmethod
+    def _decompress_in_place(local_path: str):
+        tmp_path = f"{local_path}.tmp"
+        with gzip.open(local_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        os.replace(tmp_path, local_path)
+    
     def _get_content_type(self, file_name: str) -> str:
         """Get content type based on file extension"""
         ext = os.path.splitext(file_name)[1].lower()
@@ -218,7 +276,9 @@ class S3StorageManager:
             '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
             '.doc': 'application/msword',
             '.txt': 'text/plain',
-            '.eml': 'message/rfc822'
+            '.eml': 'message/rfc822',
+            '.json': 'application/json',
+            '.html': 'text/html'
         }
         return content_types.get(ext, 'application/octet-stream')
     
@@ -231,5 +291,14 @@ class S3StorageManager:
             logger.error(f"Failed to get document hash for {s3_key}: {e}")
             return None
 
+    def check_connection(self) -> bool:
+        """Cheap connectivity probe: one HEAD request on the bucket, no listing"""
+        try:
+            self.s3_client.head_bucket(Bucket=self.bucket_name)
+            return True
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"S3 connectivity check failed: {e}")
+            return False
+
 # Global S3 storage instance
 s3_storage = S3StorageManager()
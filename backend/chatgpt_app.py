@@ -6,33 +6,45 @@ IntelliClaim: Advanced Multimodal RAG System for Document Processing
 
 
 import asyncio
+import contextlib
 
-import json
 import logging
+import mmap
 import os
+import random
 import re
 import urllib.parse
 import hashlib
+import json
+import threading
 import time
+from functools import lru_cache
+from itertools import chain
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
 
 
-import PyPDF2
+import aiofiles
+import pypdfium2 as pdfium
 # import fitz  # PyMuPDF - Removed due to Rust compilation issues on Render
 from dotenv import load_dotenv
 from fastapi import FastAPI, File, HTTPException, UploadFile, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from sentence_transformers import SentenceTransformer
 from langchain_community.vectorstores import Chroma
 from langgraph.graph import END, StateGraph
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 import uvicorn
+import httpx
+import numpy as np
 import openai
+import orjson
 import requests
+import tiktoken
 from docx import Document as DocxDocument
 from email import policy as email_policy
 from email.parser import BytesParser as EmailBytesParser
@@ -43,6 +55,7 @@ from config import get_config
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+logger.setLevel(get_config().LOG_LEVEL)  # DEBUG in development, WARNING in production
 
 
 # MODIFIED: Check for AI/ML API Key
@@ -51,17 +64,70 @@ if not os.getenv("AIMLAPI_KEY"):
 
 
 # Configure AI/ML API
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 client = OpenAI(
     base_url="https://api.aimlapi.com/v1",
     api_key=os.getenv("AIMLAPI_KEY"),
 )
 
+# Shared pooled HTTP client for all GPT5Client instances so TLS handshakes
+# to AIMLAPI are paid once per connection, not once per request
+llm_http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+)
+
 CONFIG = get_config()
 
 # --- Heuristics & Constants ---
 MAX_CONTEXT_CHARS: int = 1500  # Reduced for faster processing
+MAX_CONTEXT_TOKENS: int = 400  # Per-question hackrx context budget, in LLM tokens
+SUMMARY_INPUT_TOKENS: int = 500  # Context sent to the summariser, in LLM tokens
+SUMMARY_MIN_DENSE_SCORE: float = 1.6  # Fresh contexts scoring worse (2-2cos, i.e. cosine < 0.2) get summarised
+CACHED_CONTEXT_SUMMARY_TOKENS: int = MAX_CONTEXT_TOKENS * 4 // 5  # Cached contexts above this get summarised (was 1200 of 1500 chars)
 PER_CLAUSE_WINDOW: int = 400   # Reduced for faster processing
+FALLBACK_ANSWER: str = "Not specified in the provided context."  # hackrx answer when context is insufficient
+UPLOAD_CHUNK_SIZE: int = 1 << 20  # Stream uploads to disk 1MB at a time
+HASH_CHUNK_SIZE: int = 1 << 20    # Feed mmapped files to the hasher 1MB at a time
+WARMUP_TIMEOUT_SECONDS: float = 15.0  # Upper bound on startup warm-up before serving anyway
+
+# Fixed instruction block for batched hackrx prompts; only questions/contexts vary per call
+_PROMPT_HEAD = (
+    "You are an expert analyst. For each question, base your response strictly on its provided context. "
+    "Provide a brief answer in 1 sentence only, using verbatim language if possible. "
+    "If the context does not contain the information, respond exactly with 'Not specified in the provided context.' "
+    "If the answer is an identifier (e.g., Article/Section), respond with the exact identifier only (e.g., 'Article 11'). "
+    "For numeric ages, return the number word only (e.g., 'Fourteen'). "
+    "For yes/no questions, return 'Yes' or 'No' only if context clearly implies. "
+    'Return ONLY a JSON array of answers like ["Answer1", "Answer2"]. Do not add explanations or references.'
+    "\n\nBatched Questions:\n"
+)
+_PROMPT_TAIL = 'Respond as a JSON array of answers, like: ["Answer1", "Answer2", "Answer3"]'
+
+# Precompiled patterns for response parsing (hot path on every decision)
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+_REJECTED_RE = re.compile(r"\b(?:reject\w*|den(?:y|ied)|not eligible)\b")
+# Approval that is still being waited on ("pending approval", "approval pending", "subject to approval")
+_AWAITING_APPROVAL_RE = re.compile(
+    r"\b(?:pending|awaiting|subject to|requires?|needs?)\s+(?:\w+\s+)?approval\b|\bapproval\s+(?:is\s+)?pending\b"
+)
+_APPROVED_RE = re.compile(r"\b(?:approv(?:e[sd]?|ing)|eligible|accept\w*)\b")
+
+# Question-type detectors for the hackrx exact-match overrides (applied to lowercased questions)
+_EXPECTS_IDENT_RE = re.compile(r"\b(which|under which|what is|according to|in)\s+(article|section|clause)\b")
+_EXPECTS_A24_RE = re.compile(r"\barticle\s*24\b.*(age|years?)")
+_A17_RE = re.compile(r"\barticle\s*17\b")
+_ABOLISH_RE = re.compile(r"abolish|abolished|abolition")
+
+# Override-extraction patterns for the hackrx answer loop
+_WORD_RE = re.compile(r"\w+")
+_IDENT_RE = re.compile(r"\b(Article|Section|Clause)\s+\d+[A-Z]?\b", re.IGNORECASE)
+_AGE_RE = re.compile(r"\bage (?:age of|below|under)\s+(\d+|\w+)", re.IGNORECASE)
+_AMOUNT_Q_RE = re.compile(r"\b(rs|rupees|\$|\d+,\d+)\b")
+_AMOUNT_RE = re.compile(r"Rs\s*(\d+(?:,\d+)?)", re.IGNORECASE)
+_YESNO_RE = re.compile(r"\b(is|does|can|will|should|may|must)\s+.*\?$")
+_YES_RE = re.compile(r"\b(yes|legal|allowed|permissible)\b", re.IGNORECASE)
+_NO_RE = re.compile(r"\b(no|illegal|prohibited|not\s+permitted)\b", re.IGNORECASE)
 
 # Clause keyword biasing map (expandable for domains)
 CLAUSE_KEYWORDS: Dict[str, Tuple[str, ...]] = {
@@ -86,8 +152,19 @@ def score_clause_bias(query: str, text: str) -> int:
             hits += sum(1 for k in keywords if k in tl)
     return hits
 
+def file_sha256(file_path: str) -> str:
+    """Hash a file through mmap so large PDFs are never copied into one bytes object."""
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return hasher.hexdigest()  # mmap cannot map empty files
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            for i in range(0, len(view), HASH_CHUNK_SIZE):
+                hasher.update(view[i:i + HASH_CHUNK_SIZE])
+    return hasher.hexdigest()
+
 def build_windowed_context(query: str, chunk: str, window: int = PER_CLAUSE_WINDOW) -> str:
-    q_terms = [w for w in re.findall(r"\w+", query.lower()) if len(w) >= 4]
+    q_terms = [w for w in _WORD_RE.findall(query.lower()) if len(w) >= 4]
     first_hit = None
     cl = chunk.lower()
     for term in q_terms:
@@ -100,6 +177,17 @@ def build_windowed_context(query: str, chunk: str, window: int = PER_CLAUSE_WIND
     start = max(0, first_hit - window // 2)
     return chunk[start : min(len(chunk), start + window)]
 
+def prompt_json(obj: Any, indent: bool = False) -> str:
+    """Serialise values parsed from user text into a prompt.
+
+    orjson rejects integers wider than 64 bits (e.g. an absurd age typed by a
+    user), so those payloads fall back to the stdlib encoder instead of failing.
+    """
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+    except TypeError:
+        return json.dumps(obj, indent=2 if indent else None, default=str)
+
 
 # --- Data Models (No Changes) ---
 @dataclass
@@ -131,13 +219,50 @@ class UploadURLRequest(BaseModel):
     url: str
     async_mode: Optional[bool] = False
 
+class DecisionSchema(BaseModel):
+    """Structured-output schema for the claim decision LLM call"""
+    decision: Literal["APPROVED", "REJECTED", "PENDING"]
+    amount: Optional[float]
+    justification: str
+    confidence_score: float
+
+    # Fallback models without structured outputs return free-form values
+    # ("Approved", "Rs 50,000"); coerce them instead of failing the response
+    @field_validator("decision", mode="before")
+    @classmethod
+    def _coerce_decision(cls, value):
+        return DecisionReasoningAgent._normalize_decision(str(value) if value is not None else "")
+
+    @field_validator("amount", mode="before")
+    @classmethod
+    def _coerce_amount(cls, value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        return DecisionReasoningAgent._process_amount_field(value, None)
+
+# OpenAI-compatible response_format so the decision comes back as validated JSON
+DECISION_RESPONSE_FORMAT: Dict[str, Any] = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "claim_decision",
+        "strict": True,
+        "schema": {**DecisionSchema.model_json_schema(), "additionalProperties": False},
+    },
+}
+
 
 # --- Core RAG Components (Updated for Insurance-Specific Embeddings) ---
+@lru_cache(maxsize=None)
+def load_sentence_transformer(model_name: str) -> SentenceTransformer:
+    """Load each embedding model once per process; later callers share the instance"""
+    return SentenceTransformer(model_name)
+
+
 class InsuranceEmbeddingWrapper:
     """Wrapper to make SentenceTransformer compatible with LangChain embeddings interface"""
     
-    def __init__(self, model_name: str = "llmware/industry-bert-insurance-v0.1"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name: str = "llmware/industry-bert-insurance-v0.1", model: Optional[SentenceTransformer] = None):
+        self.model = model if model is not None else load_sentence_transformer(model_name)
         self.model_name = model_name
         logger.info(f"Initialized SentenceTransformer with {model_name}")
     
@@ -214,16 +339,10 @@ class DocumentProcessor:
         try:
             raw_text = ""
             if ext == '.pdf':
-                # Use PyPDF2 for PDF processing (PyMuPDF removed due to Rust compilation issues)
+                # Use PDFium for PDF processing (PyMuPDF removed due to Rust compilation issues)
                 try:
-                    with open(file_path, 'rb') as file:
-                        pdf_reader = PyPDF2.PdfReader(file)
-                        parts: List[str] = []
-                        for page in pdf_reader.pages:
-                            t = page.extract_text()
-                            if t and t.strip():
-                                parts.append(t)
-                        raw_text = "\n\n".join(parts)
+                    # PDFium extraction is CPU-bound; keep it off the event loop
+                    raw_text = await asyncio.to_thread(extract_text_from_pdf, file_path)
                 except Exception as e:
                     logger.error(f"PDF processing failed: {e}")
                     raw_text = ""
@@ -242,7 +361,8 @@ class DocumentProcessor:
             if not raw_text.strip():
                 return []
 
-            chunks = self._split_text_dynamic(raw_text)
+            # Splitting large documents is pure-Python CPU work; keep it off the event loop
+            chunks = await asyncio.to_thread(self._split_text_dynamic, raw_text)
             for i, chunk in enumerate(chunks):
                 documents.append(Document(
                     page_content=chunk,
@@ -269,24 +389,34 @@ class GPT5Client:
             "openai/gpt-4o-mini",           # Fallback 3: GPT-4 mini
             "openai/gpt-3.5-turbo"          # Fallback 4: GPT-3.5 as last resort
         ]
-        self.client = OpenAI(
+        # Models that accept a json_schema response_format; others get the prompt alone
+        self.structured_output_models = {
+            "openai/gpt-5-mini-2025-08-07",
+            "openai/gpt-5-2025-08-07",
+            "openai/gpt-4o-mini",
+        }
+        self.client = AsyncOpenAI(
             base_url="https://api.aimlapi.com/v1",
             api_key=self.api_key,
+            http_client=llm_http_client,
         )
 
 
     async def generate_content_async(self, prompt, **kwargs):
+        # Structured-output options are only forwarded when the caller asks for them
+        extra = {k: kwargs[k] for k in ("response_format", "tools") if kwargs.get(k) is not None}
+        plain_extra = {k: v for k, v in extra.items() if k != "response_format"}
         # Try primary model (gpt-5-mini) once
         try:
             logger.info(f"Trying primary model: {self.primary_model}")
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
+            response = await self.client.chat.completions.create(
                 model=self.primary_model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=kwargs.get("temperature", 0),
                 max_tokens=kwargs.get("max_tokens", 1000),
                 stream=False,
-                timeout=30  # Shorter timeout for mini model
+                timeout=30,  # Shorter timeout for mini model
+                **(extra if self.primary_model in self.structured_output_models else plain_extra)
             )
             
             content = response.choices[0].message.content
@@ -303,14 +433,14 @@ class GPT5Client:
         for fallback_model in self.fallback_models:
             try:
                 logger.info(f"Trying fallback model: {fallback_model}")
-                response = await asyncio.to_thread(
-                    self.client.chat.completions.create,
+                response = await self.client.chat.completions.create(
                     model=fallback_model,
                     messages=[{"role": "user", "content": prompt}],
                     temperature=kwargs.get("temperature", 0),
                     max_tokens=kwargs.get("max_tokens", 1000),
                     stream=False,
-                    timeout=60  # Longer timeout for fallback models
+                    timeout=60,  # Longer timeout for fallback models
+                    **(extra if fallback_model in self.structured_output_models else plain_extra)
                 )
                 
                 content = response.choices[0].message.content
@@ -332,11 +462,13 @@ class GPT5Client:
 
 def clean_json_response(text: str) -> str:
     """Helper function to clean the JSON string from the model's response."""
-    if not text or not text.strip():
+    if not text:
         return text
     
     # Remove markdown code blocks if present
     text = text.strip()
+    if not text:
+        return text
     if text.startswith('```json'):
         text = text[7:]
     if text.endswith('```'):
@@ -344,12 +476,11 @@ def clean_json_response(text: str) -> str:
     text = text.strip()
     
     # Try to find JSON object
-    match = re.search(r'\{', text)
-    if not match:
+    start = text.find('{')
+    if start < 0:
         return text
     
-    json_str = text[match.start():]
-    json_match = re.search(r'\{.*\}', json_str, re.DOTALL)
+    json_match = _JSON_OBJECT_RE.search(text, start)
     if json_match:
         return json_match.group(0)
     
@@ -432,10 +563,10 @@ class QueryUnderstandingAgent:
             cleaned_response = clean_json_response(response_text)
             logger.info(f"Cleaned response: {cleaned_response[:200]}...")
             
-            structured_query = json.loads(cleaned_response)
+            structured_query = orjson.loads(cleaned_response)
             context.structured_query = structured_query
             logger.info(f"Structured Query: {structured_query}")
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"JSON parsing failed: {e}")
             logger.error(f"Failed to parse: {cleaned_response if 'cleaned_response' in locals() else 'No cleaned response'}")
             context.structured_query = self._extract_entities_fallback(context.original_query)
@@ -566,7 +697,7 @@ class DecisionReasoningAgent:
                 if not cleaned_rules or cleaned_rules.strip() == "":
                     raise ValueError("No JSON content after cleaning")
                 
-                rules = json.loads(cleaned_rules)
+                rules = orjson.loads(cleaned_rules)
                 logger.info(f"Extracted policy rules: {rules}")
                 return rules
             except Exception as parse_error:
@@ -627,8 +758,8 @@ class DecisionReasoningAgent:
             You are an expert insurance claims adjudicator. Based on the query and policy rules, make a decision.
             
             QUERY: {original_query}
-            STRUCTURED INFO: {json.dumps(structured_query, indent=2)}
-            POLICY RULES: {json.dumps(policy_rules, indent=2)}
+            STRUCTURED INFO: {prompt_json(structured_query, indent=True)}
+            POLICY RULES: {prompt_json(policy_rules, indent=True)}
             
             Respond ONLY with a JSON object with these exact keys:
             {{
@@ -658,9 +789,9 @@ class DecisionReasoningAgent:
             
             # Parse decision response
             try:
-                json_match = re.search(r'\{.*\}', decision_text, re.DOTALL)
+                json_match = _JSON_OBJECT_RE.search(decision_text)
                 if json_match:
-                    decision = json.loads(json_match.group(0))
+                    decision = orjson.loads(json_match.group(0))
                     
                     # Validate decision format
                     required_keys = ["decision", "justification", "amount", "confidence_score"]
@@ -689,7 +820,8 @@ class DecisionReasoningAgent:
             logger.error(f"AI decision making failed: {e}")
             raise
     
-    def _process_amount_field(self, amount_value, policy_rules: dict):
+    @staticmethod
+    def _process_amount_field(amount_value, policy_rules: Optional[dict]):
         """Process and validate the amount field from AI decision"""
         try:
             # If AI provided a valid amount, use it
@@ -697,7 +829,7 @@ class DecisionReasoningAgent:
                 # Try to convert to integer
                 if isinstance(amount_value, str):
                     # Remove common currency symbols and convert
-                    clean_amount = re.sub(r'[₹,rs\s$€£¥]', '', str(amount_value))
+                    clean_amount = re.sub(r'[₹,rs\s$€£¥]', '', str(amount_value), flags=re.IGNORECASE)
                     if clean_amount.isdigit():
                         return int(clean_amount)
                 elif isinstance(amount_value, (int, float)):
@@ -769,29 +901,31 @@ IMPORTANT: The "decision" field must be exactly one of these values:
 - "PENDING" (if more information is needed to make a decision)
 
 QUERY: {original_query}
-STRUCTURED INFO: {json.dumps(structured_query)}
+STRUCTURED INFO: {prompt_json(structured_query)}
 
 RELEVANT POLICY CONTEXT (focused excerpts):
 {context_docs}
 
 DECISION (JSON format):
 """
-    def _normalize_decision(self, decision_str: str) -> str:
+    @staticmethod
+    def _normalize_decision(decision_str: str) -> str:
         """Normalize decision string to expected values"""
         if not decision_str:
             return "PENDING"
        
         decision_lower = decision_str.lower().strip()
        
-        # Map various decision formats to standard values
-        if any(word in decision_lower for word in ['approved', 'approve', 'eligible', 'accept']):
-            return "APPROVED"
-        elif any(word in decision_lower for word in ['rejected', 'reject', 'denied', 'deny', 'not eligible']):
+        # Map various decision formats to standard values. Rejection is checked
+        # first so "not eligible" is not mistaken for an approval; approval that is
+        # itself still awaited ("pending approval") stays pending.
+        if _REJECTED_RE.search(decision_lower):
             return "REJECTED"
-        elif any(word in decision_lower for word in ['pending', 'further', 'investigation', 'information', 'undecided']):
+        if _AWAITING_APPROVAL_RE.search(decision_lower):
             return "PENDING"
-        else:
-            return "PENDING"  # Default to pending for unknown values
+        if _APPROVED_RE.search(decision_lower):
+            return "APPROVED"
+        return "PENDING"  # Pending/further information and unknown values
 
 
     async def process(self, context: QueryContext) -> QueryContext:
@@ -800,7 +934,7 @@ DECISION (JSON format):
             return context
         prompt = self._build_reasoning_prompt(context.structured_query, context.retrieved_docs, context.original_query)
         try:
-            response_text = await self.llm.generate_content_async(prompt)
+            response_text = await self.llm.generate_content_async(prompt, response_format=DECISION_RESPONSE_FORMAT)
             logger.info(f"Raw decision response: {response_text[:200]}...")
             
             # Validate response is not empty
@@ -808,19 +942,10 @@ DECISION (JSON format):
                 logger.error("GPT-5 returned empty response")
                 raise ValueError("Empty response from GPT-5")
             
-            # Clean the response to extract JSON
-            cleaned_response = clean_json_response(response_text)
-            logger.info(f"Cleaned decision response: {cleaned_response[:200]}...")
-            
-            if not cleaned_response or cleaned_response.strip() == "":
-                logger.error("No JSON content found after cleaning")
-                raise ValueError("No JSON content in response")
-            
-            decision = json.loads(cleaned_response)
-           
-            # Normalize the decision value
-            if 'decision' in decision:
-                decision['decision'] = self._normalize_decision(decision['decision'])
+            # Schema-constrained models return bare JSON; cleaning is a no-op for them
+            # and still tolerates fenced output from fallback models; the schema's
+            # validators normalize the decision and parse free-form amounts
+            decision = DecisionSchema.model_validate_json(clean_json_response(response_text)).model_dump()
            
             context.decision = decision
             context.reasoning_chain = [prompt, response_text]
@@ -913,14 +1038,14 @@ class IntelliClaimRAG:
                 audit_trail=["Error occurred during processing"],
                 processing_time=round(processing_time, 2)
             )
-    async def add_document(self, file_path: str):
-        # Compute a stable doc hash for caching/metadata joining
-        try:
-            with open(file_path, 'rb') as fh:
-                content = fh.read()
-            doc_hash = hashlib.sha256(content).hexdigest()
-        except Exception:
-            doc_hash = None
+    async def add_document(self, file_path: str, doc_hash: Optional[str] = None):
+        # Compute a stable doc hash for caching/metadata joining (callers that
+        # streamed the file may already have it)
+        if doc_hash is None:
+            try:
+                doc_hash = await asyncio.to_thread(file_sha256, file_path)
+            except Exception:
+                doc_hash = None
         # Skip re-index if already present (idempotent ingest)
         try:
             coll = self.vector_store._collection
@@ -939,7 +1064,11 @@ class IntelliClaimRAG:
 
 
 # --- FastAPI Web Service (Config-driven) ---
-app = FastAPI(title=get_config().API_TITLE, version=get_config().API_VERSION)
+app = FastAPI(
+    title=get_config().API_TITLE,
+    version=get_config().API_VERSION,
+    default_response_class=ORJSONResponse,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://intelliclaim-frontend.onrender.com","*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"],expose_headers=["*"]
@@ -949,6 +1078,34 @@ app.add_middleware(
 rag_system = IntelliClaimRAG()
 
 
+async def _warmup_steps():
+    await asyncio.to_thread(rag_system.embedding_manager.langchain_embeddings.embed_query, "warmup")
+    collection = rag_system.vector_store._collection
+    if collection:
+        await asyncio.to_thread(collection.count)
+    # Listing models opens a pooled TLS connection without spending tokens
+    await rag_system.llm.client.models.list()
+
+
+@app.on_event("startup")
+async def warmup():
+    """Pay embedding-model, index and LLM-connection cold starts before the first request"""
+    # Bounded so a stalled provider (the client's default read timeout is 600s, plus
+    # retries) cannot hold startup and the container healthcheck for minutes
+    try:
+        await asyncio.wait_for(_warmup_steps(), timeout=WARMUP_TIMEOUT_SECONDS)
+        logger.info("Warmup completed")
+    except asyncio.TimeoutError:
+        logger.warning(f"Warmup exceeded {WARMUP_TIMEOUT_SECONDS}s, continuing with lazy initialization")
+    except Exception as e:
+        logger.warning(f"Warmup failed, continuing with lazy initialization: {e}")
+
+
+@app.on_event("shutdown")
+async def close_llm_http_client():
+    await llm_http_client.aclose()
+
+
 @app.post("/query", response_model=DecisionResponse)
 async def process_query_endpoint(request: QueryRequest):
     try:
@@ -961,12 +1118,22 @@ async def process_query_endpoint(request: QueryRequest):
 
 @app.post("/upload-document")
 async def upload_document_endpoint(file: UploadFile = File(...)):
-    if not os.path.exists("./uploads"):
-        os.makedirs("./uploads")
+    await asyncio.to_thread(os.makedirs, "./uploads", exist_ok=True)
     file_path = f"./uploads/{file.filename}"
-    with open(file_path, "wb") as buffer:
-        buffer.write(await file.read())
-    result = await rag_system.add_document(file_path)
+    # Stream to disk in 1MB chunks, hashing as we go so add_document
+    # does not need to re-read the file
+    hasher = hashlib.sha256()
+    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    # Reject files that merely carry a .pdf name before writing or parsing anything; PDF
+    # readers accept the header anywhere in the first 1KB (e.g. after a BOM or junk prefix)
+    if file.filename.lower().endswith('.pdf') and b"%PDF-" not in chunk[:1024]:
+        raise HTTPException(status_code=400, detail=f"{file.filename} is not a valid PDF file")
+    async with aiofiles.open(file_path, "wb") as buffer:
+        while chunk:
+            hasher.update(chunk)
+            await buffer.write(chunk)
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    result = await rag_system.add_document(file_path, doc_hash=hasher.hexdigest())
     if result['status'] == 'error':
         raise HTTPException(status_code=400, detail=result['message'])
     return result
@@ -1004,7 +1171,7 @@ async def test_gpt5_json():
         response = await model.generate_content_async(prompt)
         cleaned = clean_json_response(response)
         try:
-            parsed = json.loads(cleaned)
+            parsed = orjson.loads(cleaned)
             return {
                 "status": "success", 
                 "raw_response": response,
@@ -1012,7 +1179,7 @@ async def test_gpt5_json():
                 "parsed_json": parsed,
                 "primary_model": model.primary_model
             }
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             return {
                 "status": "json_parse_error",
                 "raw_response": response,
@@ -1125,6 +1292,19 @@ async def test_embedding_model():
             "error_type": type(e).__name__
         }
 
+def collect_document_sources(collection, page_size: int = 10_000) -> set:
+    """Distinct chunk sources, paging metadata only (no documents or embeddings)"""
+    sources = set()
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        metadatas = page.get('metadatas') or []
+        sources.update((m or {}).get('source', 'unknown') for m in metadatas)
+        if len(metadatas) < page_size:
+            return sources
+        offset += page_size
+
+
 @app.get("/documents")
 async def list_documents():
     """List all uploaded documents in the system"""
@@ -1132,10 +1312,11 @@ async def list_documents():
         # Get documents from vector store
         collection = rag_system.vector_store._collection
         if collection:
-            documents = collection.get()
+            total = await asyncio.to_thread(collection.count)
+            sources = await asyncio.to_thread(collect_document_sources, collection)
             return {
-                "total_documents": len(documents.get('documents', [])),
-                "document_sources": list(set(doc.get('source', 'unknown') for doc in documents.get('metadatas', [])))
+                "total_documents": total,
+                "document_sources": list(sources)
             }
         return {"total_documents": 0, "document_sources": []}
     except Exception as e:
@@ -1155,8 +1336,8 @@ async def delete_document(filename: str):
        
         # Remove file from uploads
         file_path = f"./uploads/{filename}"
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        with contextlib.suppress(FileNotFoundError):
+            await asyncio.to_thread(os.remove, file_path)
        
         return {"status": "success", "message": f"Document {filename} deleted successfully"}
     except Exception as e:
@@ -1169,7 +1350,7 @@ async def get_system_stats():
     """Get system statistics and health metrics"""
     try:
         collection = rag_system.vector_store._collection
-        total_docs = len(collection.get().get('documents', [])) if collection else 0
+        total_docs = await asyncio.to_thread(collection.count) if collection else 0
        
         return {
             "total_documents": total_docs,
@@ -1197,6 +1378,163 @@ def download_file(url: str, temp_path: str) -> bool:
     return False
 
 
+def parse_json_array(text: str) -> Any:
+    """Parse the outermost JSON array in an LLM reply (tolerates fences and chatter)"""
+    start, end = text.find('['), text.rfind(']')
+    if 0 <= start < end:
+        try:
+            return orjson.loads(text[start:end + 1])
+        except orjson.JSONDecodeError:
+            pass
+    # Bracket scan failed; fall back to parsing the fence-stripped reply as-is
+    try:
+        return orjson.loads(text.removeprefix("```json").removesuffix("```").strip())
+    except orjson.JSONDecodeError:
+        return []
+
+
+_token_encoding: Optional["tiktoken.Encoding"] = None
+
+
+def get_token_encoding() -> Optional["tiktoken.Encoding"]:
+    """Load the LLM tokenizer once, or return None (e.g. offline) and retry on the next call.
+
+    The first load may download the BPE file, so call this off the event loop.
+    """
+    global _token_encoding
+    if _token_encoding is not None:
+        return _token_encoding
+    try:
+        _token_encoding = tiktoken.encoding_for_model(CONFIG.LLM_MODEL.rsplit('/', 1)[-1])
+        return _token_encoding
+    except Exception:
+        pass  # Unknown to this tiktoken release; use the generic encoding
+    try:
+        _token_encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, falling back to character budgets: {e}")
+    return _token_encoding
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> Tuple[str, int]:
+    """Cut text at a token boundary; returns (text, tokens used)
+
+    Never loads the tokenizer itself: until get_token_encoding() has succeeded
+    (via asyncio.to_thread) a character budget is used instead.
+    """
+    enc = _token_encoding
+    if enc is None:
+        # Roughly four characters per token for English text
+        text = text[: max_tokens * 4]
+        return text, (len(text) + 3) // 4
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text, len(tokens)
+    return enc.decode(tokens[:max_tokens]), max_tokens
+
+
+def _extract_age(raw_context: str) -> Optional[str]:
+    m = _AGE_RE.search(raw_context)
+    if not m:
+        return None
+    val = m.group(1)
+    if val.lower() in ("fourteen", "14"):
+        return "Fourteen"
+    return val.capitalize() if val.isalpha() else val
+
+
+def _extract_amount(raw_context: str) -> Optional[str]:
+    m = _AMOUNT_RE.search(raw_context)
+    return f"Rs {m.group(1)}" if m else None
+
+
+def _extract_identifier(raw_context: str) -> Optional[str]:
+    m = _IDENT_RE.search(raw_context)
+    if not m:
+        return None
+    kind, num = m.group(0).split()
+    return f"{kind.capitalize()} {num.upper() if num.isalpha() else num}"
+
+
+def _extract_yesno(raw_context: str) -> Optional[str]:
+    if _YES_RE.search(raw_context):
+        return "Yes"
+    if _NO_RE.search(raw_context):
+        return "No"
+    return None
+
+
+# Exact-match override rules for hackrx, most selective first: (applies to lowercased question, extractor)
+_OVERRIDE_RULES: List[Tuple[Callable[[str], Any], Callable[[str], Optional[str]]]] = [
+    (lambda q: "age" in q or "how old" in q, _extract_age),
+    (lambda q: "amount" in q or _AMOUNT_Q_RE.search(q), _extract_amount),
+    (_EXPECTS_IDENT_RE.search, _extract_identifier),
+    (lambda q: _YESNO_RE.search(q) or "legal" in q or "allowed" in q, _extract_yesno),
+]
+
+
+def classify_override(qlower: str, raw_context: str) -> Optional[str]:
+    """Deterministic answer for a lowercased question from its context, or None to defer to the LLM"""
+    for applies, extract in _OVERRIDE_RULES:
+        if applies(qlower):
+            override = extract(raw_context)
+            if override is not None:
+                return override
+    return None
+
+
+def llm_cache_key(doc_hash: str, model_name: str, question: str) -> str:
+    return hashlib.sha1(f"{doc_hash}|{model_name}|{question}".encode("utf-8")).hexdigest()
+
+
+def normalize_rows(matrix) -> np.ndarray:
+    """Contiguous float32 copy of ``matrix`` with unit-length rows, so cosine is a dot product."""
+    m = np.asarray(matrix, dtype=np.float32)
+    return np.ascontiguousarray(m / np.maximum(np.linalg.norm(m, axis=1, keepdims=True), 1e-12))
+
+
+def dense_retrieve(query_vectors: np.ndarray, chunk_vectors: np.ndarray, documents: List[Document], k: int) -> List[List[Tuple[Document, float]]]:
+    """Top-k chunks for every query from one similarity matmul.
+
+    ``chunk_vectors`` must already be row-normalised (see normalize_rows). Scores are
+    squared L2 distances between unit vectors (2 - 2*cosine), so lower is better,
+    like FAISS L2 scores; see SUMMARY_MIN_DENSE_SCORE for how they gate summarisation.
+    """
+    sims = normalize_rows(query_vectors) @ chunk_vectors.T
+    k = min(k, sims.shape[1])
+    rows = np.arange(sims.shape[0])[:, None]
+    top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    top = np.take_along_axis(top, np.argsort(-sims[rows, top], axis=1), axis=1)
+    return [[(documents[j], float(2.0 - 2.0 * sims[i, j])) for j in row] for i, row in enumerate(top)]
+
+
+def context_cache_key(doc_hash: str, question: str) -> str:
+    return hashlib.blake2b(f"{doc_hash}|{question}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+# PDFium is not thread-safe; extraction runs in worker threads, so serialise it
+_pdfium_lock = threading.Lock()
+
+
+def extract_text_from_pdf(file_path: str) -> str:
+    # PDFium is native and much faster than pure-Python PyPDF2. It is not
+    # thread-safe, so pages are extracted sequentially under _pdfium_lock.
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            parts: List[str] = []
+            for page in pdf:
+                textpage = page.get_textpage()
+                t = textpage.get_text_range()
+                textpage.close()
+                page.close()
+                if t and t.strip():
+                    parts.append(t)
+            return "\n\n".join(parts)
+        finally:
+            pdf.close()
+
+
 def extract_text_from_docx(file_path: str) -> str:
     doc = DocxDocument(file_path)
     return '\n\n'.join([paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()])
@@ -1219,10 +1557,9 @@ async def upload_document_by_url(payload: UploadURLRequest):
     """Download a document by URL and ingest it into the vector store."""
     parsed = urllib.parse.urlparse(payload.url)
     filename = os.path.basename(parsed.path) or f"downloaded_{datetime.now().timestamp()}"
-    if not os.path.exists("./uploads"):
-        os.makedirs("./uploads")
+    await asyncio.to_thread(os.makedirs, "./uploads", exist_ok=True)
     temp_path = os.path.join("./uploads", filename)
-    if not download_file(payload.url, temp_path):
+    if not await asyncio.to_thread(download_file, payload.url, temp_path):
         raise HTTPException(status_code=500, detail="Failed to download document from URL")
     if payload.async_mode:
         # Fire-and-forget background ingestion using asyncio.create_task
@@ -1234,9 +1571,187 @@ async def upload_document_by_url(payload: UploadURLRequest):
             raise HTTPException(status_code=400, detail=result['message'])
         return result
 
+# Caps concurrent LLM batches across hackrx requests
+llm_semaphore = asyncio.Semaphore(CONFIG.MAX_CONCURRENT_REQUESTS)
+
+
+# Shared token bucket so parallel batches stay under the provider's rate limit instead of
+# tripping 429s. Only the deprecated hackrx path (410) uses it, so aiolimiter is imported
+# on first use and is not listed in requirements.txt; install it if hackrx is revived
+@lru_cache(maxsize=1)
+def get_llm_rate_limiter() -> "AsyncLimiter":
+    from aiolimiter import AsyncLimiter
+    return AsyncLimiter(CONFIG.LLM_REQUESTS_PER_SECOND, time_period=1.0)
+
+
 # Runtime caches for the hackrx endpoint
 faiss_cache = {}
-retrieval_cache = {}
+
+# Persistent exact-match answer cache, survives restarts. Only the deprecated hackrx
+# path (which returns 410 before reaching it) uses this, so diskcache is imported on
+# first use and is not listed in requirements.txt; install it if hackrx is revived
+@lru_cache(maxsize=1)
+def get_llm_cache() -> "diskcache.Cache":
+    import diskcache
+    return diskcache.Cache(CONFIG.LLM_CACHE_PATH, size_limit=2**30)
+
+
+class SemanticAnswerCache:
+    """Per-document cache of answers keyed by normalized question embeddings.
+
+    A cosine similarity at or above the threshold returns the cached answer for a
+    paraphrased question. Entries persist as {doc_hash}.npy plus a parallel
+    {doc_hash}.json of answers.
+    """
+
+    def __init__(self, directory: str, threshold: float):
+        self.directory = directory
+        self.threshold = threshold
+        self._entries: Dict[str, Tuple[np.ndarray, List[str]]] = {}
+        # Persists run in worker threads; serialise them so an older snapshot never overwrites a newer one
+        self._persist_lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    def _paths(self, doc_hash: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, doc_hash)
+        return f"{base}.npy", f"{base}.json"
+
+    def _load(self, doc_hash: str) -> Tuple[np.ndarray, List[str]]:
+        entry = self._entries.get(doc_hash)
+        if entry is None:
+            emb_path, ans_path = self._paths(doc_hash)
+            try:
+                with open(ans_path, 'rb') as fh:
+                    entry = (np.load(emb_path), orjson.loads(fh.read()))
+            except (OSError, ValueError):
+                entry = None
+            # Files out of step (e.g. written by an older, interrupted persist) count as a miss
+            if entry is None or entry[0].ndim != 2 or len(entry[1]) != entry[0].shape[0]:
+                entry = (np.empty((0, 0), dtype=np.float32), [])
+            self._entries[doc_hash] = entry
+        return entry
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def lookup(self, doc_hash: str, embedding) -> Optional[str]:
+        self.lookups += 1
+        matrix, answers = self._load(doc_hash)
+        vec = self._normalize(embedding)
+        if not answers or matrix.shape[1] != vec.shape[0]:
+            return None
+        sims = matrix @ vec
+        best = int(np.argmax(sims))
+        if sims[best] >= self.threshold:
+            self.hits += 1
+            return answers[best]
+        return None
+
+    def add_many(self, doc_hash: str, embeddings, answers: List[str]) -> None:
+        """Append several (embedding, answer) pairs in memory; call persist() to write them out."""
+        if not answers:
+            return
+        matrix, cached = self._load(doc_hash)
+        vecs = np.stack([self._normalize(e) for e in embeddings])
+        if cached and matrix.shape[1] != vecs.shape[1]:
+            matrix, cached = matrix[:0], []  # Embedding model changed; start over
+        self._entries[doc_hash] = (np.vstack([matrix.reshape(-1, vecs.shape[1]), vecs]), cached + list(answers))
+
+    def persist(self, doc_hash: str) -> None:
+        """Write the current entries for doc_hash to disk. Blocking; run it via asyncio.to_thread."""
+        with self._persist_lock:
+            entry = self._entries.get(doc_hash)
+            if entry is None:
+                return
+            matrix, answers = entry
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                emb_path, ans_path = self._paths(doc_hash)
+                # Write to temporary files and swap them in, so a crash never leaves a torn file
+                with open(f"{emb_path}.tmp", 'wb') as fh:
+                    np.save(fh, matrix)
+                with open(f"{ans_path}.tmp", 'wb') as fh:
+                    fh.write(orjson.dumps(answers))
+                os.replace(f"{emb_path}.tmp", emb_path)
+                os.replace(f"{ans_path}.tmp", ans_path)
+            except OSError as e:
+                logger.warning(f"Could not persist semantic cache for {doc_hash}: {e}")
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.hits / self.lookups) * 100 if self.lookups else 0.0
+
+
+semantic_cache = SemanticAnswerCache(CONFIG.SEMANTIC_CACHE_PATH, CONFIG.SEMANTIC_CACHE_THRESHOLD)
+
+
+def store_answers(doc_hash: str, entries: List[Tuple[str, str]], persist_semantic: bool) -> None:
+    """Write fresh (cache key, answer) pairs to the LLM cache and flush the semantic cache. Blocking."""
+    llm_cache = get_llm_cache()
+    for key, answer in entries:
+        llm_cache.set(key, answer)
+    if persist_semantic:
+        semantic_cache.persist(doc_hash)
+
+
+def embedding_model_tag(embedder) -> str:
+    """Filesystem-safe name of the active embedding model, so cached vectors never mix models."""
+    name = getattr(embedder, "model_name", None) or f"{type(embedder).__name__}{getattr(embedder, 'size', '')}"
+    return re.sub(r"[^\w.-]+", "_", name)
+
+
+def embedding_dimension(embedder) -> Optional[int]:
+    """Output dimension of the embedding model, or None when it cannot be determined up front."""
+    model = getattr(embedder, "model", None)
+    if model is not None and hasattr(model, "get_sentence_embedding_dimension"):
+        return model.get_sentence_embedding_dimension()
+    return getattr(embedder, "size", None)
+
+
+def load_document_embeddings(doc_hash: str, model_tag: str, dimension: Optional[int] = None) -> Optional[Tuple[List[str], np.ndarray]]:
+    """Return persisted (chunks, float16 chunk embeddings) for a document, or None on a miss.
+
+    Entries whose vectors do not match ``dimension`` are treated as a miss so the
+    caller re-embeds instead of failing on a shape mismatch at query time.
+    """
+    base = os.path.join(CONFIG.FAISS_CACHE_PATH, f"{doc_hash}.{model_tag}")
+    try:
+        with open(f"{base}.chunks.json", 'rb') as fh:
+            chunks = orjson.loads(fh.read())
+        embeddings = np.load(f"{base}.npy")
+    except (OSError, ValueError):
+        return None
+    if embeddings.ndim != 2 or len(chunks) != len(embeddings):
+        return None
+    if dimension is not None and embeddings.shape[1] != dimension:
+        logger.info(f"Discarding cached embeddings for {doc_hash}: dimension {embeddings.shape[1]} != {dimension}")
+        return None
+    return chunks, embeddings
+
+
+def save_document_embeddings(doc_hash: str, model_tag: str, chunks: List[str], embeddings: np.ndarray) -> None:
+    """Persist chunk texts and their embeddings under FAISS_CACHE_PATH keyed by doc_hash and model."""
+    base = os.path.join(CONFIG.FAISS_CACHE_PATH, f"{doc_hash}.{model_tag}")
+    try:
+        os.makedirs(CONFIG.FAISS_CACHE_PATH, exist_ok=True)
+        # float16 halves disk and load bandwidth; unit vectors keep ~3 significant digits, plenty for ranking
+        np.save(f"{base}.npy", embeddings.astype(np.float16))
+        with open(f"{base}.chunks.json", 'wb') as fh:
+            fh.write(orjson.dumps(chunks))
+    except OSError as e:
+        logger.warning(f"Could not persist document embeddings for {doc_hash}: {e}")
+
+
+# Retrieved contexts are deterministic per (doc_hash, question), so they persist
+# across restarts and model/prompt changes; opened lazily like get_llm_cache
+@lru_cache(maxsize=1)
+def get_retrieval_cache() -> "diskcache.Cache":
+    import diskcache
+    return diskcache.Cache(CONFIG.CONTEXT_CACHE_PATH, size_limit=2**30)
 summary_cache = {}
 
 # Add this near your other endpoints
@@ -1250,7 +1765,7 @@ async def hackrx_run(request: Request, authorization: str = Header(None)):
     raise HTTPException(status_code=410, detail="Endpoint deprecated. Use /upload-document, /upload-document-url, and /query.")
  
     body = await request.json()
-    print("Debug: Received request body:", body)
+    logger.debug(f"Received request body: {body}")
 
     documents_url = body.get("documents")
     questions = body.get("questions", [])
@@ -1258,8 +1773,19 @@ async def hackrx_run(request: Request, authorization: str = Header(None)):
     if not documents_url or not isinstance(questions, list) or not questions:
         raise HTTPException(status_code=400, detail="Missing or invalid documents URL or questions")
 
-    print("Debug: Processing document URL:", documents_url)
-    print("Debug: Number of questions:", len(questions))
+    logger.debug(f"Processing document URL: {documents_url}")
+    logger.debug(f"Number of questions: {len(questions)}")
+
+    # Question-type expectations, computed once per distinct question
+    qmeta: Dict[str, Tuple[bool, bool, bool]] = {}
+    for q in questions:
+        if q not in qmeta:
+            ql = q.lower()
+            qmeta[q] = (
+                bool(_EXPECTS_IDENT_RE.search(ql)),
+                bool(_EXPECTS_A24_RE.search(ql)),
+                bool(_A17_RE.search(ql) and _ABOLISH_RE.search(ql)),
+            )
  
     # Parse filename from URL
     parsed_url = urllib.parse.urlparse(documents_url)
@@ -1268,27 +1794,22 @@ async def hackrx_run(request: Request, authorization: str = Header(None)):
  
     temp_file = f"./temp_{int(time.time()*1000)}{file_extension}"
  
-    if not download_file(documents_url, temp_file):
+    if not await asyncio.to_thread(download_file, documents_url, temp_file):
         raise HTTPException(status_code=500, detail="Failed to download document")
 
-    print("Debug: Document downloaded successfully to:", temp_file)
+    logger.debug(f"Document downloaded successfully to: {temp_file}")
  
     try:
         # Process document based on type
         raw_text = ""
         if file_extension == '.pdf':
-            with open(temp_file, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text = page.extract_text()
-                    if text:
-                        raw_text += text + '\n\n'
+            raw_text = await asyncio.to_thread(extract_text_from_pdf, temp_file)
         elif file_extension == '.docx':
-            raw_text = extract_text_from_docx(temp_file)
+            raw_text = await asyncio.to_thread(extract_text_from_docx, temp_file)
         else:
             raise HTTPException(status_code=400, detail=f"Unsupported file type: {file_extension}")
  
-        print("Debug: Extracted raw text length:", len(raw_text))
+        logger.debug(f"Extracted raw text length: {len(raw_text)}")
         # Compute content hash for persistent caching
         try:
             doc_hash = hashlib.sha256(raw_text.encode("utf-8", errors="ignore")).hexdigest()
@@ -1298,231 +1819,265 @@ async def hackrx_run(request: Request, authorization: str = Header(None)):
         if not raw_text.strip():
             raise HTTPException(status_code=400, detail="No text could be extracted from the document")
  
-        # Split into chunks - dynamic chunk size
+        # Split into chunks - dynamic chunk size; reuse persisted chunks/embeddings by content hash
         doc_length = len(raw_text)
-        chunk_size = 500 if doc_length < 100000 else 1000 if doc_length < 500000 else 2000  # Dynamic based on size
-        chunk_overlap = 300 if doc_length >= 200000 else 100
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-        chunks = text_splitter.split_text(raw_text)
-
-        print("Debug: Number of chunks:", len(chunks))
-        if chunks:
-            print("Debug: Sample chunk[0]:", chunks[0][:200] + "...")  # First 200 chars of first chunk
+        embedder = rag_system.embedding_manager.langchain_embeddings
+        model_tag = embedding_model_tag(embedder)
+        cached_doc = await asyncio.to_thread(load_document_embeddings, doc_hash, model_tag, embedding_dimension(embedder))
+        if cached_doc is not None:
+            chunks, chunk_embeddings = cached_doc[0], np.ascontiguousarray(cached_doc[1], dtype=np.float32)
+            logger.debug(f"Loaded persisted chunk embeddings for {doc_hash}")
+        else:
+            chunk_size = 500 if doc_length < 100000 else 1000 if doc_length < 500000 else 2000  # Dynamic based on size
+            chunk_overlap = 300 if doc_length >= 200000 else 100
+            text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+            chunks = await asyncio.to_thread(text_splitter.split_text, raw_text)
+            # Embed every chunk once per document; each batch of questions is then
+            # scored against this matrix in a single call
+            try:
+                chunk_embeddings = normalize_rows(await asyncio.to_thread(embedder.embed_documents, chunks))
+                await asyncio.to_thread(save_document_embeddings, doc_hash, model_tag, chunks, chunk_embeddings)
+            except Exception as e:
+                logger.warning(f"Chunk embedding failed, using positional retrieval: {e}")
+                chunk_embeddings = None
+
+        logger.debug(f"Number of chunks: {len(chunks)}")
+        if chunks and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Sample chunk[0]: {chunks[0][:200]}...")  # First 200 chars of first chunk
  
         # Create documents
         documents = [Document(page_content=chunk, metadata={"source": filename, "chunk": i}) for i, chunk in enumerate(chunks)]
  
         # Create/load FAISS vector store (persistent by content hash)
         cache_key = documents_url  # URL cache (runtime)
-        faiss_dir = os.path.join(".", "faiss_cache", doc_hash)
         if cache_key in faiss_cache:
             vector_store = faiss_cache[cache_key]
-            print("Debug: Loaded cached vector store for", cache_key)
+            logger.debug(f"Loaded cached vector store for {cache_key}")
         else:
             # Production: use existing Chroma store from rag_system
             vector_store = rag_system.vector_store
 
-        print("Debug: Vector store created with", len(documents), "documents")
+        logger.debug(f"Vector store created with {len(documents)} documents")
  
-        # Initialize LLM
+        # Initialize LLM; load the tokenizer off the event loop (retried per request until it succeeds)
         model = GPT5Client(os.getenv("AIMLAPI_KEY"))
+        await asyncio.to_thread(get_token_encoding)
  
-        print("Debug: Starting answer generation for", len(questions), "questions")
+        logger.debug(f"Starting answer generation for {len(questions)} questions")
  
         async def generate_answer(questions_batch, vector_store, model, all_documents, doc_length, doc_hash):
-            start_time = time.time()
-            try:
-                # Detect if batch has potentially high-weight (complex) questions
-                is_complex_batch = any(len(q) > 50 or any(word in q.lower() for word in ['derive', 'explain', 'list', 'how does']) for q in questions_batch)
-                batch_timeout = 30.0 if is_complex_batch else 20.0  # Keep dynamic timeout
-                batch_max_retries = 3  # Relaxed to 3 for all with higher quota
-                print("Debug: Batch complexity:", "Complex" if is_complex_batch else "Standard", "- Timeout:", batch_timeout, "Retries:", batch_max_retries)
+            # Bound in-flight LLM batches; the semaphore, not batch count, gates parallelism
+            async with llm_semaphore:
+                start_time = time.time()
+                try:
+                    # Detect if batch has potentially high-weight (complex) questions
+                    is_complex_batch = any(len(q) > 50 or any(word in ql for word in ('derive', 'explain', 'list', 'how does')) for q, ql in ((q, q.lower()) for q in questions_batch))
+                    batch_timeout = 30.0 if is_complex_batch else 20.0  # Keep dynamic timeout
+                    batch_max_retries = 3  # Relaxed to 3 for all with higher quota
+                    logger.debug(f"Batch complexity: {'Complex' if is_complex_batch else 'Standard'} - Timeout: {batch_timeout} Retries: {batch_max_retries}")
+
+                    # Exact-match answer cache: only questions that miss go through retrieval and the LLM
+                    cache_keys = {q: llm_cache_key(doc_hash, model.primary_model, q) for q in questions_batch}
+                    answers: List[Optional[str]] = [get_llm_cache().get(cache_keys[q]) for q in questions_batch]
+                    # Unique, order-preserving: repeated questions are answered once
+                    pending = list(dict.fromkeys(q for q, a in zip(questions_batch, answers) if a is None))
+                    if not pending:
+                        logger.debug("All answers served from cache for batch")
+                        return answers
+
+                    # Near-duplicate (paraphrase) cache, scoped to this document
+                    try:
+                        question_embeddings = dict(zip(pending, await asyncio.to_thread(embedder.embed_documents, pending)))
+                    except Exception as e:
+                        logger.warning(f"Semantic cache disabled for batch: {e}")
+                        question_embeddings = {}
+                    if question_embeddings:
+                        for i, q in enumerate(questions_batch):
+                            if answers[i] is None:
+                                answers[i] = semantic_cache.lookup(doc_hash, question_embeddings[q])
+                        pending = list(dict.fromkeys(q for q, a in zip(questions_batch, answers) if a is None))
+                        if not pending:
+                            logger.debug("All answers served from semantic cache for batch")
+                            return answers
                 
-                # Retrieve contexts for all questions in batch (hybrid + clause bias)
-                batch_contexts = []
-                override_answers: List[Optional[str]] = []
-                # Use simple similarity search instead of undefined _HybridRetriever
-                def simple_retrieve(question, docs, k=3):
-                    return [(doc, 1.0) for doc in docs[:k]]
+                    # Retrieve contexts for all questions in batch (hybrid + clause bias)
+                    batch_contexts = []
+                    override_answers: List[Optional[str]] = []
+                    # Use simple similarity search instead of undefined _HybridRetriever
+                    def simple_retrieve(question, docs, k=3):
+                        return [(doc, 1.0) for doc in docs[:k]]
                 
-                def dynamic_k(doc_length):
-                    return 3 if doc_length < 100000 else 4 if doc_length < 500000 else 5
+                    def dynamic_k(doc_length):
+                        return 3 if doc_length < 100000 else 4 if doc_length < 500000 else 5
                 
-                def clause_bias(question, docs):
-                    return sorted(docs, key=lambda d: score_clause_bias(question, d.page_content), reverse=True)
+                    def clause_bias(question, docs):
+                        return sorted(docs, key=lambda d: score_clause_bias(question, d.page_content), reverse=True)
                 
-                retriever = type('SimpleRetriever', (), {
-                    'score_and_combine': simple_retrieve,
-                    'dynamic_k': dynamic_k,
-                    'clause_bias': clause_bias
-                })()
-                for question in questions_batch:
-                    qlower = question.lower()
-                    # Precompute question-type expectations for reuse
-                    expects_identifier = bool(re.search(r"\b(which|under which|what is|according to|in)\s+(article|section|clause)\b", qlower))
-                    expects_article24_age = bool(re.search(r"\barticle\s*24\b.*(age|years?)", qlower))
-                    expects_article17_abolish = bool(re.search(r"\barticle\s*17\b", qlower) and re.search(r"abolish|abolished|abolition", qlower))
+                    retriever = type('SimpleRetriever', (), {
+                        'score_and_combine': simple_retrieve,
+                        'dynamic_k': dynamic_k,
+                        'clause_bias': clause_bias
+                    })()
+                    # Dense retrieval for every context-cache miss in one batched search
                     k_val = retriever.dynamic_k(doc_length)
-                    # Retrieval cache
-                    cache_key_ret = (doc_hash, question)
-                    cached_context = retrieval_cache.get(cache_key_ret)
-                    if cached_context is None:
-                        combined = retriever.score_and_combine(question, all_documents, k=k_val)
-                        docs_only = [d for d, _ in combined]
-                        docs_biased = retriever.clause_bias(question, docs_only)
-                        # Build windowed context, centered near query terms
-                        context_parts, chars_left = [], MAX_CONTEXT_CHARS
-                        for d in docs_biased:
-                            if chars_left <= 0:
-                                break
-                            chunk = d.page_content
-                            q_terms = [w for w in re.findall(r"\w+", question.lower()) if len(w) >= 4]
-                            first_hit = None
-                            for term in q_terms:
-                                idx = chunk.lower().find(term)
-                                if idx >= 0:
-                                    first_hit = idx
+                    dense_hits: Dict[str, List[Tuple[Document, float]]] = {}
+                    if chunk_embeddings is not None and len(chunk_embeddings) and question_embeddings:
+                        misses = [q for q in pending if context_cache_key(doc_hash, q) not in get_retrieval_cache()]
+                        if misses:
+                            query_matrix = np.asarray([question_embeddings[q] for q in misses], dtype=np.float32)
+                            dense_hits = dict(zip(misses, dense_retrieve(query_matrix, chunk_embeddings, all_documents, k_val)))
+                    for question in pending:
+                        qlower = question.lower()
+                        expects_identifier, expects_article24_age, expects_article17_abolish = qmeta[question]
+                        # Retrieval cache
+                        cache_key_ret = context_cache_key(doc_hash, question)
+                        cached_context = get_retrieval_cache().get(cache_key_ret)
+                        if cached_context is None:
+                            combined = dense_hits.get(question) or retriever.score_and_combine(question, all_documents, k=k_val)
+                            docs_only = [d for d, _ in combined]
+                            docs_biased = retriever.clause_bias(question, docs_only)
+                            # Build windowed context, centered near query terms
+                            context_parts, tokens_left = [], MAX_CONTEXT_TOKENS
+                            q_terms = [w for w in _WORD_RE.findall(qlower) if len(w) >= 4]
+                            for d in docs_biased:
+                                if tokens_left <= 0:
                                     break
-                            if first_hit is None:
-                                excerpt = chunk[: min(len(chunk), PER_CLAUSE_WINDOW)]
-                            else:
-                                start = max(0, first_hit - PER_CLAUSE_WINDOW // 2)
-                                excerpt = chunk[start : min(len(chunk), start + PER_CLAUSE_WINDOW)]
-                            take = excerpt[:chars_left]
-                            context_parts.append(take)
-                            chars_left -= len(take)
-                        raw_context = "\n\n".join(context_parts)
-                        retrieval_cache[cache_key_ret] = raw_context
-                        # Approximate average dense score from combined results
-                        try:
-                            avg_faiss = sum(sc for _, sc in combined) / max(1, len(combined))
-                        except Exception:
-                            avg_faiss = 9.99
-                    else:
-                        raw_context = cached_context
-                        # Heuristic score proxy when using cached context
-                        avg_faiss = 0.9 if len(raw_context) <= 1200 else 1.2
-                    # Decide summarization based on average FAISS score
-                    if raw_context and avg_faiss > 1.1 and not (expects_identifier or expects_article24_age or expects_article17_abolish):
-                        summary_key = (doc_hash, question)
-                        cached_summary = summary_cache.get(summary_key)
-                        if cached_summary is None:
-                            summary_prompt = f"Summarize this context concisely in 200 words or less, focusing on key facts relevant to: {question}\n\nContext: {raw_context[:2000]}"
+                                chunk = d.page_content
+                                chunk_lower = chunk.lower()
+                                first_hit = None
+                                for term in q_terms:
+                                    idx = chunk_lower.find(term)
+                                    if idx >= 0:
+                                        first_hit = idx
+                                        break
+                                if first_hit is None:
+                                    excerpt = chunk[: min(len(chunk), PER_CLAUSE_WINDOW)]
+                                else:
+                                    start = max(0, first_hit - PER_CLAUSE_WINDOW // 2)
+                                    excerpt = chunk[start : min(len(chunk), start + PER_CLAUSE_WINDOW)]
+                                take, used = truncate_to_tokens(excerpt, tokens_left)
+                                context_parts.append(take)
+                                tokens_left -= used
+                            raw_context = "\n\n".join(context_parts)
+                            await asyncio.to_thread(get_retrieval_cache().set, cache_key_ret, raw_context)
+                            # Average dense score, mapped onto the same 0.9/1.2 scale as the cached-context
+                            # proxy: only clearly off-topic retrievals pay for a summarisation call
                             try:
-                                summary_response = await model.generate_content_async(
-                                    summary_prompt,
-                                    temperature=0
-                                )
-                                context = summary_response.strip()
-                                summary_cache[summary_key] = context
-                                print("Debug: Summarized context for", question, ":", (context[:200] + "...") if context else "EMPTY")
-                            except Exception as e:
-                                print("Debug: Summary error for", question, ":", str(e))
-                                context = raw_context[:1500]
+                                avg_score = sum(sc for _, sc in combined) / max(1, len(combined))
+                                avg_faiss = 1.2 if avg_score > SUMMARY_MIN_DENSE_SCORE else 0.9
+                            except Exception:
+                                avg_faiss = 9.99
                         else:
-                            context = cached_summary
-                    else:
-                        context = raw_context[:1500]
-                        if avg_faiss <= 1.0 or (expects_identifier or expects_article24_age or expects_article17_abolish):
-                            print("Debug: Skipped summarization for good score/exact-match question:", question)
+                            raw_context = cached_context
+                            # Heuristic score proxy when using cached context: contexts filling most
+                            # of the token budget look like weak, scattered matches
+                            avg_faiss = 0.9 if truncate_to_tokens(raw_context, MAX_CONTEXT_TOKENS)[1] <= CACHED_CONTEXT_SUMMARY_TOKENS else 1.2
+                        # Decide summarization based on average FAISS score
+                        if raw_context and avg_faiss > 1.1 and not (expects_identifier or expects_article24_age or expects_article17_abolish):
+                            summary_key = (doc_hash, question)
+                            cached_summary = summary_cache.get(summary_key)
+                            if cached_summary is None:
+                                summary_prompt = f"Summarize this context concisely in 200 words or less, focusing on key facts relevant to: {question}\n\nContext: {truncate_to_tokens(raw_context, SUMMARY_INPUT_TOKENS)[0]}"
+                                try:
+                                    # Summaries hit the same provider quota as answer batches
+                                    async with get_llm_rate_limiter():
+                                        summary_response = await model.generate_content_async(
+                                            summary_prompt,
+                                            temperature=0
+                                        )
+                                    context = summary_response.strip()
+                                    summary_cache[summary_key] = context
+                                    logger.debug(f"Summarized context for {question}: {(context[:200] + '...') if context else 'EMPTY'}")
+                                except Exception as e:
+                                    logger.warning(f"Summary error for {question}: {e}")
+                                    context = truncate_to_tokens(raw_context, MAX_CONTEXT_TOKENS)[0]
+                            else:
+                                context = cached_summary
+                        else:
+                            context = truncate_to_tokens(raw_context, MAX_CONTEXT_TOKENS)[0]
+                            if avg_faiss <= 1.0 or (expects_identifier or expects_article24_age or expects_article17_abolish):
+                                logger.debug(f"Skipped summarization for good score/exact-match question: {question}")
                     
-                    if not context or len(context) < 50:
-                        print("Debug: Minimal context for", question, "- Forcing fallback")
-                        batch_contexts.append((question, ""))
-                        override_answers.append(None)
-                    else:
-                        batch_contexts.append((question, context))
-                        # Compute regex-based override for exact-match grading
-                        override: Optional[str] = None
-                        # General identifier extraction (e.g., Article X, Section Y, Clause Z)
-                        expects_identifier = bool(re.search(r"\b(which|under which|what is|according to|in)\s+(article|section|clause)\b", qlower))
-                        if expects_identifier:
-                            m = re.findall(r"\b(Article|Section|Clause)\s+\d+[A-Z]?\b", raw_context, flags=re.IGNORECASE)
-                            if m:
-                                best = m[0]
-                                type_ = best.split()[0].capitalize()
-                                num = best.split()[1].upper() if best.split()[1].isalpha() else best.split()[1]
-                                override = f"{type_} {num}"
-                                print("Debug: General identifier override:", override)
-                        # General numeric/age extraction (e.g., below the age of X, Rs Y)
-                        if "age" in qlower or re.search(r"\b(how old|below what age|age of)\b", qlower):
-                            m = re.search(r"\bage (?:age of|below|under)\s+(\d+|\w+)", raw_context, flags=re.IGNORECASE)
-                            if m:
-                                val = m.group(1)
-                                num_map = {"fourteen": "Fourteen", "14": "Fourteen"}
-                                override = num_map.get(val.lower(), val.capitalize() if val.isalpha() else val)
-                                print("Debug: General age override:", override)
-                        elif "amount" in qlower or re.search(r"\b(rs|rupees|\$|\d+,\d+)\b", qlower):
-                            m = re.search(r"Rs\s*(\d+(?:,\d+)?)", raw_context, flags=re.IGNORECASE)
-                            if m:
-                                override = f"Rs {m.group(1)}"
-                                print("Debug: General amount override:", override)
-                        # Yes/No questions
-                        expects_yesno = bool(re.search(r"\b(is|does|can|will|should|may|must)\s+.*\?$", qlower) or "legal" in qlower or "allowed" in qlower)
-                        if expects_yesno and override is None:
-                            if re.search(r"\b(yes|no|legal|illegal|allowed|prohibited|permissible|not permitted)\b", raw_context.lower()):
-                                override = "Yes" if "yes" in raw_context.lower() or "legal" in raw_context.lower() or "allowed" in raw_context.lower() else "No"
-                                print("Debug: Yes/No override:", override)
-                        override_answers.append(override)
+                        if not context or len(context) < 50:
+                            logger.debug(f"Minimal context for {question} - Forcing fallback")
+                            batch_contexts.append((question, ""))
+                            override_answers.append(None)
+                        else:
+                            batch_contexts.append((question, context))
+                            override = classify_override(qlower, raw_context)
+                            if override is not None:
+                                logger.debug(f"Regex override for {question}: {override}")
+                            override_answers.append(override)
                  
-                # Build batched prompt
-                batched_questions_str = "\n".join([f"Question {i+1}: {q}" for i, q in enumerate(questions_batch)])
-                batched_contexts_str = "\n\n".join([f"Context for Question {i+1}:\n{c}" for i, (_, c) in enumerate(batch_contexts)])
-                
-                prompt = f"""You are an expert analyst. For each question, base your response strictly on its provided context. Provide a brief answer in 1 sentence only, using verbatim language if possible. If the context does not contain the information, respond exactly with 'Not specified in the provided context.' If the answer is an identifier (e.g., Article/Section), respond with the exact identifier only (e.g., 'Article 11'). For numeric ages, return the number word only (e.g., 'Fourteen'). For yes/no questions, return 'Yes' or 'No' only if context clearly implies. Return ONLY a JSON array of answers like ["Answer1", "Answer2"]. Do not add explanations or references.
-                
-Batched Questions:
-{batched_questions_str}
-
-Batched Contexts:
-{batched_contexts_str}
-
-Respond as a JSON array of answers, like: ["Answer1", "Answer2", "Answer3"]"""
+                    # Rule-derived answers need no inference; only the rest go to the LLM
+                    fresh_by_question = {q: a for q, a in zip(pending, override_answers) if a is not None}
+                    llm_batch = [(q, c) for (q, c), a in zip(batch_contexts, override_answers) if a is None]
+                    if not llm_batch:
+                        logger.info(f"All {len(pending)} questions answered by overrides; skipping LLM call")
+                        return [a if a is not None else fresh_by_question[q] for q, a in zip(questions_batch, answers)]
+                    llm_questions = [q for q, _ in llm_batch]
+
+                    # Build batched prompt: questions and contexts in one writer, one final join
+                    parts: List[str] = [_PROMPT_HEAD]
+                    for i, question in enumerate(llm_questions, 1):
+                        parts.append(f"Question {i}: {question}\n")
+                    parts.append("\nBatched Contexts:\n")
+                    for i, (_, c) in enumerate(llm_batch, 1):
+                        parts.append(f"Context for Question {i}:\n{c}\n\n")
+                    parts.append(_PROMPT_TAIL)
+                    prompt = "".join(parts)
                 
-                print("Debug: Full prompt:", prompt[:500] + "...")  # Print start of prompt for inspection
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Full prompt: {prompt[:500]}...")  # Start of prompt for inspection
                 
-                # AI/ML API call with retry
-                answers = None
-                for attempt in range(batch_max_retries):
-                    try:
-                        response = await asyncio.wait_for(
-                            model.generate_content_async(
-                                prompt,
-                                temperature=0
-                            ),
-                            timeout=batch_timeout
-                        )
-                        print("Debug: Full AI/ML API response:", response)
-                        answers_text = response.strip()
-                        # Basic JSON array parse
+                    # AI/ML API call with retry
+                    fresh = None
+                    for attempt in range(batch_max_retries):
                         try:
-                            answers = json.loads(
-                                answers_text.removeprefix("```json").removesuffix("```").strip()
+                            async with get_llm_rate_limiter():
+                                response = await asyncio.wait_for(
+                                    model.generate_content_async(
+                                        prompt,
+                                        temperature=0
+                                    ),
+                                    timeout=batch_timeout
+                                )
+                            logger.debug(f"Full AI/ML API response: {response}")
+                            answers_text = response.strip()
+                            fresh = parse_json_array(answers_text)
+                            if not isinstance(fresh, list) or len(fresh) != len(llm_questions):
+                                raise ValueError("Mismatched answer count")
+                            # One semantic-cache write per LLM response; disk writes stay off the event loop
+                            embedded = [(question_embeddings[q], out) for q, out in zip(llm_questions, fresh) if q in question_embeddings]
+                            if embedded:
+                                semantic_cache.add_many(doc_hash, [e for e, _ in embedded], [out for _, out in embedded])
+                            await asyncio.to_thread(
+                                store_answers, doc_hash, [(cache_keys[q], out) for q, out in zip(llm_questions, fresh)], bool(embedded)
                             )
-                        except Exception:
-                            m = re.search(r"\[.*\]", answers_text, re.DOTALL)
-                            answers = json.loads(m.group(0)) if m else []
-                        if not isinstance(answers, list) or len(answers) != len(questions_batch):
-                            raise ValueError("Mismatched answer count")
-                        break
-                    except Exception as e:
-                        if "429" in str(e) and attempt < batch_max_retries - 1:
-                            wait_time = 5 * (2 ** attempt)
-                            print(f"Debug: 429 quota error on attempt {attempt+1}. Retrying after {wait_time}s...")
-                            await asyncio.sleep(wait_time)
-                        else:
-                            print("Error processing batch:", questions_batch, "Exception:", str(e))
-                            answers = ["Not specified in the provided context." for _ in questions_batch]
                             break
+                        except Exception as e:
+                            if "429" in str(e) and attempt < batch_max_retries - 1:
+                                wait_time = 1 + random.random()  # Rare behind the limiter; short jitter suffices
+                                logger.warning(f"429 quota error on attempt {attempt+1}. Retrying after {wait_time:.1f}s...")
+                                await asyncio.sleep(wait_time)
+                            else:
+                                logger.error(f"Error processing batch: {questions_batch} Exception: {e}")
+                                fresh = [FALLBACK_ANSWER for _ in llm_questions]
+                                break
+
+                    # Scatter fresh answers back to every position (including repeats)
+                    fresh_by_question.update(zip(llm_questions, fresh))
+                    answers = [a if a is not None else fresh_by_question[q] for q, a in zip(questions_batch, answers)]
 
-                # Return answers
-                for q, out in zip(questions_batch, answers):
-                    print("Debug: Generated answer for question:", q, "(Length:", len(str(out)), ", Time:", round(time.time() - start_time, 2), "s):", str(out)[:100] + "...")
-                return answers
+                    # Return answers
+                    if logger.isEnabledFor(logging.DEBUG):
+                        for q, out in zip(questions_batch, answers):
+                            logger.debug(f"Generated answer for question: {q} (Length: {len(str(out))}, Time: {round(time.time() - start_time, 2)}s): {str(out)[:100]}...")
+                    return answers
             
-            except asyncio.TimeoutError:
-                print("Debug: Timeout for batch:", questions_batch)
-                return ["Not specified in the provided context." for _ in questions_batch]  # Graceful fallback
+                except asyncio.TimeoutError:
+                    logger.warning(f"Timeout for batch: {questions_batch}")
+                    return [FALLBACK_ANSWER for _ in questions_batch]  # Graceful fallback
         
         # Parallel processing with batching
         start_total = time.time()
@@ -1530,23 +2085,29 @@ Respond as a JSON array of answers, like: ["Answer1", "Answer2", "Answer3"]"""
         batches = [questions[i:i + batch_size] for i in range(0, len(questions), batch_size)]
         tasks = [generate_answer(batch, vector_store, model, documents, doc_length, doc_hash) for batch in batches]
         batched_answers = await asyncio.gather(*tasks)
-        answers = [ans for batch in batched_answers for ans in batch]  # Flatten
+        # Flatten and count successful answers in a single pass
+        answers = []
+        successful_answers = 0
+        for ans in chain.from_iterable(batched_answers):
+            answers.append(ans)
+            if ans != FALLBACK_ANSWER and not (isinstance(ans, str) and "Error" in ans):
+                successful_answers += 1
 
         # Basic metrics logging
         total_questions = len(questions)
-        successful_answers = sum(1 for ans in answers if ans != "Not specified in the provided context." and "Error" not in ans)
         fallback_count = total_questions - successful_answers
-        print("Metrics: Fallbacks:", fallback_count, "/", total_questions)
+        logger.info(f"Metrics: Fallbacks: {fallback_count}/{total_questions}")
         success_rate = (successful_answers / total_questions) * 100 if total_questions > 0 else 0
         avg_time = round((time.time() - start_total) / total_questions, 2) if total_questions > 0 else 0
-        print("Metrics: Success Rate:", f"{success_rate:.2f}%", "Avg Time per Question:", avg_time, "s")
-        print("Debug: All answers generated. Total time:", round(time.time() - start_total, 2), "s")
+        logger.info(f"Metrics: Success Rate: {success_rate:.2f}% Avg Time per Question: {avg_time}s")
+        logger.info(f"Metrics: Semantic cache hit rate: {semantic_cache.hit_rate:.2f}%")
+        logger.debug(f"All answers generated. Total time: {round(time.time() - start_total, 2)}s")
  
         return {"answers": answers}
  
     finally:
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
+        with contextlib.suppress(FileNotFoundError):
+            await asyncio.to_thread(os.remove, temp_file)
 
 
 if __name__ == "__main__":
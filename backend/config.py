@@ -29,14 +29,20 @@ class Config:
     VECTOR_STORE_PATH = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
     UPLOAD_PATH = os.getenv("UPLOAD_DIR", "./uploads")
     FAISS_CACHE_PATH = os.getenv("FAISS_CACHE_DIR", "./faiss_cache")
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_DIR", "./llm_cache")
+    CONTEXT_CACHE_PATH = os.getenv("CONTEXT_CACHE_DIR", "./ctx_cache")
+    SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_DIR", "./semcache")
     
     # Retrieval Settings
     TOP_K_DOCUMENTS = 5
     SIMILARITY_THRESHOLD = 0.7
+    SEMANTIC_CACHE_THRESHOLD = 0.95  # Cosine similarity for reusing a cached answer
     
     # Processing Settings
     MAX_PROCESSING_TIME = 30  # seconds
     BATCH_SIZE = 50
+    MAX_CONCURRENT_REQUESTS = 8  # In-flight LLM calls per worker
+    LLM_REQUESTS_PER_SECOND = MAX_CONCURRENT_REQUESTS  # Shared LLM rate limit per worker
     
     # Security
     ALLOWED_ORIGINS = ["*"]  # Configure for production
@@ -86,6 +92,9 @@ class Config:
             "chroma_persist_directory": cls.VECTOR_STORE_PATH,
             "upload_directory": cls.UPLOAD_PATH,
             "faiss_cache_directory": cls.FAISS_CACHE_PATH,
+            "llm_cache_directory": cls.LLM_CACHE_PATH,
+            "context_cache_directory": cls.CONTEXT_CACHE_PATH,
+            "semantic_cache_directory": cls.SEMANTIC_CACHE_PATH,
             "max_file_size": cls.MAX_FILE_SIZE,
             "allowed_file_types": cls.ALLOWED_FILE_TYPES,
             "render_deployment": cls.RENDER_DEPLOYMENT
@@ -6,8 +6,13 @@ Migrates local files to AWS S3 with CloudFront CDN
 
 import os
 import sys
+import hashlib
 import logging
-from typing import List, Dict, Any
+import mmap
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterator, Optional
 from datetime import datetime
 
 # Add the parent directory to the path to import modules
@@ -22,47 +27,91 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+# boto3/s3transfer log every request and part at INFO; keep only their warnings
+for noisy in ('boto3', 'botocore', 's3transfer'):
+    logging.getLogger(noisy).setLevel(logging.WARNING)
+
+PROGRESS_INTERVAL = 5.0  # Seconds between migration progress lines
+
+def parallel_copytree(src: str, dst: str, workers: int = 8) -> None:
+    """copytree that copies files on a thread pool; copytree still walks and creates directories"""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        shutil.copytree(src, dst, copy_function=lambda s, d: futures.append(executor.submit(shutil.copy2, s, d)))
+        for future in as_completed(futures):
+            future.result()  # Surface the first copy error
+
+def multipart_etag(buf, part_size: int) -> str:
+    """Multipart objects get the MD5 of the concatenated part MD5s plus a part count"""
+    part_digests = [hashlib.md5(buf[i:i + part_size]).digest() for i in range(0, len(buf), part_size)]
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+def s3_etag(file_path: str, multipart_threshold: int, part_size: int) -> str:
+    """ETag S3 assigns to this file when uploaded with the given transfer settings"""
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < multipart_threshold:
+            return hashlib.file_digest(f, "md5").hexdigest()
+        # Hash the parts straight out of the page cache via mmap
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                return multipart_etag(view, part_size)
+            finally:
+                view.release()
 
 class StorageMigrator:
     """Handles migration from local storage to AWS S3"""
     
-    def __init__(self):
+    def __init__(self, workers: int = 16):
         self.aws_config = get_aws_config()
         self.uploads_dir = "./uploads"
+        self.failed_dir = "./uploads_failed"
+        self.workers = workers
+        self._stats_lock = threading.Lock()
+        self.existing_documents: Dict[str, Dict[str, Any]] = {}
+        self._migrated_files: Optional[List[Dict[str, Any]]] = None
+        # Every worker thread shares the one S3 client, and each multipart upload runs up to
+        # max_concurrency part uploads of its own; give every one of them a connection
+        pool_size = workers * s3_storage.transfer_config.max_concurrency
+        if pool_size > self.aws_config.S3_MAX_POOL_CONNECTIONS:
+            s3_storage.s3_client = self.aws_config.get_s3_client(max_pool_connections=pool_size)
         self.migration_stats = {
             'files_processed': 0,
             'files_uploaded': 0,
+            'files_skipped': 0,
             'errors': 0,
+            'files_preserved': 0,
+            'bytes_original': 0,
+            'bytes_stored': 0,
             'start_time': datetime.now()
         }
     
-    def get_local_files(self) -> List[Dict[str, Any]]:
-        """Get list of files in local uploads directory"""
-        files = []
-        
+    def get_local_files(self) -> Iterator[Dict[str, Any]]:
+        """Yield files in the local uploads directory as they are listed"""
         if not os.path.exists(self.uploads_dir):
             logger.warning(f"Uploads directory {self.uploads_dir} does not exist")
-            return files
+            return
         
+        count = 0
         try:
-            for filename in os.listdir(self.uploads_dir):
-                file_path = os.path.join(self.uploads_dir, filename)
-                
-                if os.path.isfile(file_path):
-                    file_stat = os.stat(file_path)
-                    files.append({
-                        'filename': filename,
-                        'file_path': file_path,
-                        'size': file_stat.st_size,
-                        'modified_time': datetime.fromtimestamp(file_stat.st_mtime)
-                    })
+            # scandir entries carry the file type from readdir, so only stat() costs a syscall
+            with os.scandir(self.uploads_dir) as it:
+                for entry in it:
+                    if entry.is_file(follow_symlinks=False):
+                        file_stat = entry.stat()
+                        count += 1
+                        yield {
+                            'filename': entry.name,
+                            'file_path': entry.path,
+                            'size': file_stat.st_size,
+                            'modified_time': datetime.fromtimestamp(file_stat.st_mtime)
+                        }
             
-            logger.info(f"Found {len(files)} files in {self.uploads_dir}")
-            return files
+            logger.info(f"Found {count} files in {self.uploads_dir}")
             
         except Exception as e:
             logger.error(f"Failed to list files in {self.uploads_dir}: {e}")
-            return []
     
     def migrate_file(self, file_info: Dict[str, Any]) -> bool:
         """Migrate a single file to S3"""
@@ -70,46 +119,102 @@ class StorageMigrator:
             filename = file_info['filename']
             file_path = file_info['file_path']
             
-            logger.info(f"Migrating file: {filename} ({file_info['size']} bytes)")
+            if self._already_in_s3(file_info):
+                self._increment('files_skipped')
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Skipping {filename}: identical copy already in S3")
+                return True
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Migrating file: {filename} ({file_info['size']} bytes)")
             
             # Upload to S3
             result = s3_storage.upload_document(file_path, filename)
             
             if result["status"] == "success":
-                self.migration_stats['files_uploaded'] += 1
-                logger.info(f"Successfully uploaded {filename} to S3")
+                self._increment('files_uploaded')
+                self._increment('bytes_original', result['size'])
+                self._increment('bytes_stored', result['stored_size'])
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Successfully uploaded {filename} to S3")
                 return True
             else:
                 logger.error(f"Failed to upload {filename}: {result.get('message', 'Unknown error')}")
-                self.migration_stats['errors'] += 1
+                self._increment('errors')
+                self._preserve_failed(file_info)
                 return False
                 
         except Exception as e:
             logger.error(f"Failed to migrate file {file_info.get('filename', 'unknown')}: {e}")
-            self.migration_stats['errors'] += 1
+            self._increment('errors')
+            self._preserve_failed(file_info)
             return False
     
+    def _preserve_failed(self, file_info: Dict[str, Any]):
+        """Move a file whose upload failed into failed_dir for a later re-drive"""
+        try:
+            os.makedirs(self.failed_dir, exist_ok=True)
+            # os.replace is an atomic rename, so a crash never leaves the file in neither place
+            os.replace(file_info['file_path'], os.path.join(self.failed_dir, file_info['filename']))
+            self._increment('files_preserved')
+        except OSError as e:
+            logger.error(f"Could not move {file_info['filename']} to {self.failed_dir}, left in place: {e}")
+    
+    def _already_in_s3(self, file_info: Dict[str, Any]) -> bool:
+        """True when S3 holds an object with the same name, size and content ETag"""
+        existing: Optional[Dict[str, Any]] = self.existing_documents.get(file_info['filename'])
+        if existing is None:
+            return False
+        transfer = s3_storage.transfer_config
+        if s3_storage.is_compressible(file_info['filename']):
+            # Stored gzip-encoded: compare against the deterministic compressed body
+            body = s3_storage.compress_document(file_info['file_path'])
+            if existing['size'] != len(body):
+                return False
+            etag = hashlib.md5(body).hexdigest() if len(body) < transfer.multipart_threshold else multipart_etag(body, transfer.multipart_chunksize)
+            return existing['etag'] == etag
+        if existing['size'] != file_info['size']:
+            return False
+        return existing['etag'] == s3_etag(file_info['file_path'], transfer.multipart_threshold, transfer.multipart_chunksize)
+    
+    def _increment(self, stat: str, amount: int = 1):
+        """Bump a migration counter; called from upload worker threads"""
+        with self._stats_lock:
+            self.migration_stats[stat] += amount
+    
     def migrate_all_files(self):
         """Migrate all files from local storage to S3"""
         logger.info("Starting storage migration...")
         
-        # Get local files
-        files = self.get_local_files()
+        # One listing up front so files already migrated can be skipped
+        self.existing_documents = {d['file_name']: d for d in s3_storage.list_documents()}
+        
+        # Report progress on a timer instead of per file
+        futures = {}
+        done = threading.Event()
+        reporter = threading.Thread(target=self._report_progress, args=(futures, done), daemon=True)
+        reporter.start()
+        
+        # Upload concurrently; files are submitted as soon as they are listed
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for file_info in self.get_local_files():
+                    futures[executor.submit(self.migrate_file, file_info)] = file_info
+                
+                # Keep the files now safely in S3 so cleanup does not have to rescan the directory
+                self._migrated_files = []
+                for future in as_completed(futures):
+                    if future.result():
+                        self._migrated_files.append(futures[future])
+                        self._increment('files_processed')
+        finally:
+            done.set()
+            reporter.join()
         
-        if not files:
+        if not futures:
             logger.warning("No files found to migrate")
             return
         
-        # Migrate each file
-        for file_info in files:
-            success = self.migrate_file(file_info)
-            if success:
-                self.migration_stats['files_processed'] += 1
-            
-            # Log progress every 5 files
-            if self.migration_stats['files_processed'] % 5 == 0:
-                logger.info(f"Progress: {self.migration_stats['files_processed']}/{len(files)} files processed")
-        
         # Calculate migration time
         migration_time = datetime.now() - self.migration_stats['start_time']
         
@@ -117,7 +222,12 @@ class StorageMigrator:
         logger.info("=== Storage Migration Complete ===")
         logger.info(f"Total files processed: {self.migration_stats['files_processed']}")
         logger.info(f"Total files uploaded: {self.migration_stats['files_uploaded']}")
+        logger.info(f"Total files skipped (already in S3): {self.migration_stats['files_skipped']}")
         logger.info(f"Errors encountered: {self.migration_stats['errors']}")
+        logger.info(f"Failed files moved to {self.failed_dir}: {self.migration_stats['files_preserved']}")
+        if self.migration_stats['bytes_stored']:
+            ratio = self.migration_stats['bytes_original'] / self.migration_stats['bytes_stored']
+            logger.info(f"Bytes uploaded: {self.migration_stats['bytes_stored']} (from {self.migration_stats['bytes_original']}, {ratio:.2f}x compression)")
         logger.info(f"Migration time: {migration_time}")
         
         if self.migration_stats['errors'] > 0:
@@ -125,6 +235,15 @@ class StorageMigrator:
         else:
             logger.info("Storage migration completed successfully!")
     
+    def _report_progress(self, futures: Dict[Any, Dict[str, Any]], done: threading.Event):
+        """Log one progress line every PROGRESS_INTERVAL seconds until the migration finishes"""
+        while not done.wait(PROGRESS_INTERVAL):
+            stats = self.migration_stats
+            logger.info(
+                f"Progress: {stats['files_processed']}/{len(futures)} processed, "
+                f"uploaded={stats['files_uploaded']} skipped={stats['files_skipped']} errors={stats['errors']}"
+            )
+    
     def verify_migration(self):
         """Verify that migration was successful"""
         try:
@@ -146,11 +265,8 @@ class StorageMigrator:
     def create_backup(self):
         """Create backup of local files before migration"""
         try:
-            import shutil
-            import datetime
-            
-            backup_dir = f"./uploads_backup_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            shutil.copytree(self.uploads_dir, backup_dir)
+            backup_dir = f"./uploads_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            parallel_copytree(self.uploads_dir, backup_dir)
             
             logger.info(f"Local files backup created at: {backup_dir}")
             return backup_dir
@@ -159,18 +275,19 @@ class StorageMigrator:
             logger.error(f"Failed to create backup: {e}")
             return None
     
-    def cleanup_local_files(self, confirm: bool = False):
-        """Clean up local files after successful migration"""
+    def cleanup_local_files(self, confirm: bool = False, files: Optional[List[Dict[str, Any]]] = None):
+        """Clean up local files after successful migration (defaults to the files just migrated)"""
         if not confirm:
             logger.info("Skipping local file cleanup (use --cleanup flag to confirm)")
             return
         
         try:
-            files = self.get_local_files()
+            if files is None:
+                files = self._migrated_files if self._migrated_files is not None else list(self.get_local_files())
             
             for file_info in files:
                 try:
-                    os.remove(file_info['file_path'])
+                    os.unlink(file_info['file_path'])
                     logger.info(f"Removed local file: {file_info['filename']}")
                 except Exception as e:
                     logger.error(f"Failed to remove {file_info['filename']}: {e}")
@@ -186,22 +303,33 @@ def main():
     
     parser = argparse.ArgumentParser(description='Migrate local storage to AWS S3')
     parser.add_argument('--cleanup', action='store_true', help='Clean up local files after migration')
+    parser.add_argument('--backup', action='store_true', help='Copy the uploads directory to a timestamped backup before migrating')
     parser.add_argument('--verify-only', action='store_true', help='Only verify existing migration')
+    parser.add_argument('--workers', type=int, default=16, help='Number of concurrent S3 uploads (default: 16)')
+    parser.add_argument('--multipart-chunksize', type=int, help='Multipart threshold and part size in MB (default: S3_MULTIPART_CHUNKSIZE_MB or 8)')
+    parser.add_argument('--max-concurrency', type=int, help='Parallel parts per multipart upload (default: S3_MAX_CONCURRENCY or 10)')
     
     args = parser.parse_args()
     
-    migrator = StorageMigrator()
+    if args.multipart_chunksize or args.max_concurrency:
+        s3_storage.transfer_config = s3_storage.build_transfer_config(
+            chunksize=args.multipart_chunksize * 1024 * 1024 if args.multipart_chunksize else None,
+            max_concurrency=args.max_concurrency
+        )
+    
+    migrator = StorageMigrator(workers=args.workers)
     
     try:
         if args.verify_only:
             migrator.verify_migration()
             return
         
-        # Create backup first
-        logger.info("Creating backup of local files...")
-        backup_dir = migrator.create_backup()
-        if backup_dir:
-            logger.info(f"Backup created at: {backup_dir}")
+        # Failed uploads are moved to uploads_failed/, so a full backup is opt-in
+        if args.backup:
+            logger.info("Creating backup of local files...")
+            backup_dir = migrator.create_backup()
+            if backup_dir:
+                logger.info(f"Backup created at: {backup_dir}")
         
         # Perform migration
         migrator.migrate_all_files()
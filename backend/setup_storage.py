@@ -36,16 +36,13 @@ def setup_storage():
             print(f"✗ Error creating directory {directory}: {e}")
             return False
     
-    # Verify write permissions
+    # Verify write permissions (one access(2) call instead of a write/unlink round-trip)
     print("\nVerifying write permissions...")
     for directory in directories:
-        try:
-            test_file = Path(directory) / ".test_write"
-            test_file.write_text("test")
-            test_file.unlink()  # Clean up test file
+        if os.access(directory, os.W_OK | os.X_OK):
             print(f"✓ Write permission verified for: {directory}")
-        except Exception as e:
-            print(f"✗ Write permission failed for {directory}: {e}")
+        else:
+            print(f"✗ Write permission failed for {directory}")
             return False
     
     # Display storage configuration
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Regression tests for decision string normalization in DecisionReasoningAgent
+"""
+
+import os
+import sys
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+def normalize(decision):
+    # Imported lazily: importing chatgpt_app boots the RAG system (models, vector store)
+    from chatgpt_app import DecisionReasoningAgent
+    return DecisionReasoningAgent._normalize_decision(decision)
+
+def test_undecided_wording_stays_pending():
+    """Phrases that mention approval without granting it must not approve a claim"""
+    for phrase in (
+        "Pending approval",
+        "Subject to approval",
+        "Awaiting approval - further information needed",
+        "Approval pending investigation",
+        "Requires manager approval",
+        "Approval",
+    ):
+        assert normalize(phrase) == "PENDING", phrase
+
+def test_approved_wording():
+    for phrase in ("APPROVED", "Approve", "approves", "approved for payment", "Eligible", "Accepted"):
+        assert normalize(phrase) == "APPROVED", phrase
+
+def test_approval_with_pending_words_elsewhere_stays_approved():
+    """Pending-style words only win when it is the approval itself being waited on"""
+    for phrase in (
+        "Approved subject to deductible",
+        "Claim approved after investigation",
+        "Eligible, no further information needed",
+    ):
+        assert normalize(phrase) == "APPROVED", phrase
+
+def test_rejected_wording():
+    for phrase in ("REJECTED", "Denied", "deny", "Not eligible", "Rejected pending appeal"):
+        assert normalize(phrase) == "REJECTED", phrase
+
+def test_empty_and_unknown_default_to_pending():
+    for phrase in ("", None, "unclear"):
+        assert normalize(phrase) == "PENDING", phrase
+
+def test_schema_coerces_free_form_fallback_output():
+    """Non-strict fallback models must not fail validation on free-form values"""
+    from chatgpt_app import DecisionSchema
+    decision = DecisionSchema.model_validate_json(
+        '{"decision": "Approved", "amount": "Rs 50,000", "justification": "Covered", "confidence_score": 80}'
+    )
+    assert decision.decision == "APPROVED"
+    assert decision.amount == 50000
+
+if __name__ == "__main__":
+    test_undecided_wording_stays_pending()
+    test_approved_wording()
+    test_approval_with_pending_words_elsewhere_stays_approved()
+    test_rejected_wording()
+    test_empty_and_unknown_default_to_pending()
+    test_schema_coerces_free_form_fallback_output()
+    print("✅ Decision normalization tests passed")
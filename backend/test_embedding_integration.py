@@ -6,6 +6,7 @@ Test script for the industry-bert-insurance-v0.1 embedding integration
 import os
 import sys
 import logging
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Add the current directory to the path so we can import our modules
@@ -18,12 +19,25 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TEST_TEXTS = [
+    "insurance policy coverage for medical expenses",
+    "claim settlement process for health insurance",
+    "waiting period for pre-existing conditions"
+]
+
+@lru_cache(maxsize=None)
+def reference_embeddings(model_name: str):
+    """Encode TEST_TEXTS once per model in a single batch; later tests compare against this"""
+    # Same process-wide loader the app uses, so every test shares one instance per model
+    from chatgpt_app import load_sentence_transformer
+    return load_sentence_transformer(model_name).encode(TEST_TEXTS, batch_size=len(TEST_TEXTS), convert_to_numpy=True)
+
 def test_embedding_integration():
     """Test the insurance embedding model integration"""
     try:
         # Import our modules
         from config import get_config
-        from chatgpt_app import EmbeddingManager, InsuranceEmbeddingWrapper
+        from chatgpt_app import EmbeddingManager, InsuranceEmbeddingWrapper, load_sentence_transformer
         
         config = get_config()
         logger.info(f"Testing with config: {config.EMBEDDING_MODEL}")
@@ -32,16 +46,8 @@ def test_embedding_integration():
         # Test 1: Direct SentenceTransformer model (Primary)
         logger.info("=== Test 1: Direct SentenceTransformer (Primary) ===")
         try:
-            from sentence_transformers import SentenceTransformer
-            model = SentenceTransformer(config.EMBEDDING_MODEL)
-            
-            test_texts = [
-                "insurance policy coverage for medical expenses",
-                "claim settlement process for health insurance",
-                "waiting period for pre-existing conditions"
-            ]
-            
-            embeddings = model.encode(test_texts, convert_to_tensor=False)
+            model = load_sentence_transformer(config.EMBEDDING_MODEL)
+            embeddings = reference_embeddings(config.EMBEDDING_MODEL)
             logger.info(f"✅ Direct model test successful!")
             logger.info(f"   - Model: {model}")
             logger.info(f"   - Embedding shape: {embeddings.shape}")
@@ -53,9 +59,9 @@ def test_embedding_integration():
         # Test 1b: Direct SentenceTransformer model (Fallback)
         logger.info("\n=== Test 1b: Direct SentenceTransformer (Fallback) ===")
         try:
-            fallback_model = SentenceTransformer(config.EMBEDDING_FALLBACK_MODEL)
+            fallback_model = load_sentence_transformer(config.EMBEDDING_FALLBACK_MODEL)
             
-            embeddings = fallback_model.encode(test_texts, convert_to_tensor=False)
+            embeddings = reference_embeddings(config.EMBEDDING_FALLBACK_MODEL)
             logger.info(f"✅ Fallback model test successful!")
             logger.info(f"   - Model: {fallback_model}")
             logger.info(f"   - Embedding shape: {embeddings.shape}")
@@ -67,10 +73,12 @@ def test_embedding_integration():
         # Test 2: InsuranceEmbeddingWrapper
         logger.info("\n=== Test 2: InsuranceEmbeddingWrapper ===")
         try:
-            wrapper = InsuranceEmbeddingWrapper()
+            wrapper = InsuranceEmbeddingWrapper(config.EMBEDDING_MODEL)
             
             # Test document embedding
-            doc_embeddings = wrapper.embed_documents(test_texts)
+            doc_embeddings = wrapper.embed_documents(TEST_TEXTS)
+            expected_shape = reference_embeddings(config.EMBEDDING_MODEL).shape
+            assert (len(doc_embeddings), len(doc_embeddings[0])) == expected_shape, f"Expected shape {expected_shape}"
             logger.info(f"✅ Document embedding test successful!")
             logger.info(f"   - Documents processed: {len(doc_embeddings)}")
             logger.info(f"   - Embedding dimension: {len(doc_embeddings[0])}")
@@ -94,7 +102,7 @@ def test_embedding_integration():
             logger.info(f"   - Current model: {embedding_manager.langchain_embeddings.model_name if hasattr(embedding_manager.langchain_embeddings, 'model_name') else 'OpenAI API Model'}")
             
             # Test actual embedding
-            test_embeddings = embedding_manager.langchain_embeddings.embed_documents(test_texts)
+            test_embeddings = embedding_manager.langchain_embeddings.embed_documents(TEST_TEXTS)
             logger.info(f"   - Test embeddings generated: {len(test_embeddings)}")
             
         except Exception as e:
@@ -110,16 +118,15 @@ def test_embedding_integration():
 def test_model_download():
     """Test if the model can be downloaded"""
     try:
-        from sentence_transformers import SentenceTransformer
         logger.info("=== Testing Model Download ===")
+        from chatgpt_app import load_sentence_transformer
         
         # This will download the model if not already present
-        model = SentenceTransformer("llmware/industry-bert-insurance-v0.1")
+        model = load_sentence_transformer("llmware/industry-bert-insurance-v0.1")
         logger.info("✅ Model downloaded/loaded successfully!")
         
-        # Test with a simple insurance text
-        test_text = "health insurance policy coverage"
-        embedding = model.encode([test_text], convert_to_tensor=False)
+        # Encode the shared test texts; the integration tests reuse this result
+        embedding = reference_embeddings("llmware/industry-bert-insurance-v0.1")
         logger.info(f"✅ Test embedding generated: shape {embedding.shape}")
         
         return True